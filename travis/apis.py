@@ -1,19 +1,114 @@
 # coding: utf-8
 
 import base64
+import hashlib
 import os
 import json
+import tempfile
+from multiprocessing.pool import ThreadPool
+
 import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 
 
 class ApiException(Exception):
     pass
 
 
+class HttpCache(object):
+    """On disk cache of GET responses keyed by url.
+    The responses are stored with their `ETag` and `Last-Modified`
+    headers to revalidate them with conditional requests, so the server
+    answers 304 without payload if they did not change."""
+
+    # Headers of the response kept in the cache
+    headers = ('Content-Type', 'ETag', 'Last-Modified', 'Link')
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+
+    def _path(self, url, auth=None):
+        # The authorization is part of the key to don't share private
+        # responses between tokens
+        key = hashlib.sha1(
+            ('%s\n%s' % (url, auth or '')).encode('UTF-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def get(self, url, auth=None):
+        """Return the cached entry of the url or None"""
+        try:
+            with open(self._path(url, auth)) as f_entry:
+                return json.load(f_entry)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def conditional_headers(self, entry):
+        """Return the headers to revalidate a cached entry"""
+        headers = {}
+        if entry['headers'].get('ETag'):
+            headers['If-None-Match'] = entry['headers']['ETag']
+        if entry['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+        return headers
+
+    def set(self, url, response, auth=None):
+        """Store a successful response if it can be revalidated"""
+        headers = dict((name, response.headers[name])
+                       for name in self.headers if name in response.headers)
+        if not headers.get('ETag') and not headers.get('Last-Modified'):
+            return
+        entry = {
+            'url': url,
+            'headers': headers,
+            'content': base64.b64encode(response.content).decode('ascii'),
+        }
+        path = self._path(url, auth)
+        try:
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'w') as f_entry:
+                json.dump(entry, f_entry)
+            os.rename(tmp_path, path)
+        except (IOError, OSError):
+            # The cache is only an optimization
+            pass
+
+    @staticmethod
+    def to_response(entry):
+        """Build a response object from a cached entry"""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response._content = base64.b64decode(entry['content'])
+        response.encoding = requests.utils.get_encoding_from_headers(
+            response.headers)
+        return response
+
+
 class Request(object):
 
-    def __init__(self):
+    def __init__(self, cache=None):
+        """
+        :param cache: Optional HttpCache used to revalidate GET requests
+        """
         self.session = requests.Session()
+        self.cache = cache
+
+    def _get(self, url):
+        if not self.cache:
+            return self.session.get(url)
+        auth = self.session.headers.get('Authorization')
+        entry = self.cache.get(url, auth)
+        headers = self.cache.conditional_headers(entry) if entry else {}
+        response = self.session.get(url, headers=headers)
+        if entry and response.status_code == 304:
+            return self.cache.to_response(entry)
+        if response.status_code == 200:
+            self.cache.set(url, response, auth)
+        return response
 
     def _check(self):
         if not self._token:
@@ -28,7 +123,7 @@ class Request(object):
     def _request(self, url, payload=None, is_json=True, patch=False):
         try:
             if not payload and not patch:
-                response = self.session.get(url)
+                response = self._get(url)
             elif patch:
                 response = self.session.patch(url, data=payload)
             else:
@@ -39,6 +134,74 @@ class Request(object):
         return response.json() if is_json else response
 
 
+class GitHubReadApi(Request):
+    """Read only client of the GitHub API sharing a pool of keep-alive
+    connections between sequential and concurrent requests."""
+
+    def __init__(self, host="https://api.github.com", token=None,
+                 max_workers=8, cache=None):
+        """
+        :param host: Url of the GitHub API or of a proxy of it
+        :param token: Optional GitHub token
+        :param max_workers: Max number of concurrent requests
+        :param cache: Optional HttpCache of the responses
+        """
+        super(GitHubReadApi, self).__init__(cache=cache)
+        self.host = host.rstrip('/')
+        self._token = token
+        self.max_workers = max_workers
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'User-Agent': 'mqt'})
+        if token:
+            self.session.headers.update(
+                {'Authorization': 'Token %s' % token})
+
+    def url(self, path):
+        """Return the full url of a path of the API"""
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return self.host + path
+
+    def get(self, path, is_json=True):
+        return self._request(self.url(path), is_json=is_json)
+
+    def get_paginated(self, path):
+        """Return the items of all the pages of a list endpoint,
+        following the `next` links of the responses"""
+        items = []
+        url = self.url(path)
+        while url:
+            response = self._request(url, is_json=False)
+            items.extend(response.json())
+            url = response.links.get('next', {}).get('url')
+        return items
+
+    def get_many(self, paths, is_json=True):
+        """Request several paths concurrently
+        :return: List of responses in the same order of paths
+        """
+        paths = list(paths)
+        if len(paths) <= 1:
+            return [self.get(path, is_json) for path in paths]
+        pool = ThreadPool(min(self.max_workers, len(paths)))
+        try:
+            return pool.map(lambda path: self.get(path, is_json), paths)
+        finally:
+            pool.close()
+            pool.join()
+
+    def get_pull_commits(self, repo_slug, pull_number):
+        # https://developer.github.com/v3/pulls/#list-commits-on-a-pull-request
+        return self.get_paginated('/repos/%s/pulls/%s/commits?per_page=100' % (
+            repo_slug, pull_number))
+
+    def get_compare(self, repo_slug, base, head):
+        # https://developer.github.com/v3/repos/commits/#compare-two-commits
+        return self.get('/repos/%s/compare/%s...%s' % (repo_slug, base, head))
+
+
 class GitHubApi(Request):
 
     def __init__(self):
@@ -1,6 +1,10 @@
 import collections
+import os
 import re
-import requests
+
+from apis import ApiException, GitHubReadApi, HttpCache
+from git_run import GitRun
+from travis_helpers import get_cache_dir
 
 
 DEVELOPMENT_TAGS = [':memo:', ':fire:', ':fire_engine:', ':tv:', ':lock:', ':bath:', ':green_heart:', ':cat:', ':bomb:']
@@ -11,6 +15,181 @@ VERSION_TAGS_DICT = {'zero': '0', 'one': '1', 'two': '2', 'three': '3', 'four':
                     'seven': '7', 'eight': '8', 'nine': '9'}
 VERSION_TAGS = [':zero:', ':one:', ':two:', ':three:', ':four:', ':five:', ':six:', ':seven:', ':eight:', ':nine:']
 REQUIREMENTS_TAGS_OF_VERSION = [':x:', ':arrow_up:', ':arrow_down:', ':tada:']
+GITHUB_API_PROXY = 'https://github.it-projects.info'
+
+_github_clients = {}
+
+
+def get_github_client():
+    """Return the GitHub client shared by all the requests of the check.
+    The API host can be changed with the CHECK_TAGS_API_HOST environment
+    variable. The responses are revalidated against an on disk cache
+    unless MQT_HTTP_CACHE is 0"""
+    host = os.environ.get('CHECK_TAGS_API_HOST', GITHUB_API_PROXY)
+    if host not in _github_clients:
+        cache = None
+        if os.environ.get('MQT_HTTP_CACHE', '1') != '0':
+            cache = HttpCache(get_cache_dir('http'))
+        _github_clients[host] = GitHubReadApi(host, cache=cache)
+    return _github_clients[host]
+
+
+class GitHubBackend(object):
+    """Get the commits of the pull request from the GitHub API"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """The client is shared by all the backends, keep it open"""
+
+    def get_pull_commits(self, repo_slug, pull_number):
+        return self.client.get_pull_commits(repo_slug, pull_number)
+
+    def get_commits(self, commit_urls):
+        """Return the details of the commits, with their changed files"""
+        return self.client.get_many([
+            url.replace('https://api.github.com', self.client.host)
+            for url in commit_urls])
+
+    def get_compare(self, repo_slug, base, head):
+        return self.client.get_compare(repo_slug, base, head)
+
+    def get_raw_files(self, raw_urls):
+        return [response.text for response in
+                self.client.get_many(raw_urls, is_json=False)]
+
+
+class LocalGitBackend(object):
+    """Get the same data than GitHubBackend from the local clone of the
+    repository with a few batched git commands, without network requests.
+    The urls of the commits are their sha and the raw urls of the files
+    are `sha:filename` revisions"""
+
+    def __init__(self, git_run, commit_range):
+        """
+        :param git_run: GitRun of the repository
+        :param commit_range: Range of the commits of the pull request,
+            e.g. "base..head". A "base...head" range is used as "base..head"
+        """
+        self.git_run = git_run
+        self.commit_range = commit_range.replace('...', '..')
+        self._commits = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Stop the git processes started to read the files"""
+        self.git_run.close()
+
+    def _run(self, command):
+        res = self.git_run.run(command)
+        if res is None:
+            raise ApiException('git %s failed' % ' '.join(command))
+        return res
+
+    def _log(self, args, paths=None):
+        """Return the output of `git log` for every commit of the range,
+        in chronological order
+        :return: List of tuples (sha, parents, message, output)
+        """
+        command = ['log', '--reverse', '--topo-order', '--no-renames',
+                   '--format=%x1e%H%x1f%P%x1f%B%x1f'] + args + [
+                       self.commit_range]
+        if paths:
+            command += ['--'] + paths
+        commits = []
+        for chunk in self._run(command).split('\x1e')[1:]:
+            sha, parents, message, output = chunk.split('\x1f', 3)
+            commits.append((sha, parents.split(), message.strip(), output))
+        return commits
+
+    @staticmethod
+    def _parse_diff(diff):
+        """Return the patch of every file of a git diff output
+        :return: Dict {filename: patch}
+        """
+        patches = {}
+        for section in re.split(r'^diff --git ', diff, flags=re.M)[1:]:
+            filename = re.search(r'^\+\+\+ b/(.*)$', section, re.M) or \
+                re.search(r'^--- a/(.*)$', section, re.M)
+            if not filename:
+                continue
+            index = section.find('\n@@')
+            patches[filename.group(1)] = \
+                section[index + 1:] if index >= 0 else ''
+        return patches
+
+    def _get_commits(self):
+        if self._commits is None:
+            self._commits = collections.OrderedDict()
+            for sha, parents, message, numstat in self._log(['--numstat']):
+                filenames = [line.split('\t', 2)[2]
+                             for line in numstat.splitlines() if line]
+                self._commits[sha] = (parents, message, filenames)
+        return self._commits
+
+    def get_pull_commits(self, repo_slug, pull_number):
+        return [{
+            'sha': sha,
+            'url': sha,
+            'parents': [{'sha': parent} for parent in parents],
+            'commit': {'message': message},
+        } for sha, (parents, message, _) in self._get_commits().items()]
+
+    def get_commits(self, commit_urls):
+        """Return the details of the commits, with their changed files.
+        Only the patches of the changelogs are included"""
+        commits = self._get_commits()
+        patches = dict(
+            (sha, self._parse_diff(diff))
+            for sha, _, _, diff in self._log(['-p'], ['*doc/changelog.rst']))
+        return [{
+            'sha': sha,
+            'commit': {'message': commits[sha][1]},
+            'files': [{
+                'filename': filename,
+                'patch': patches.get(sha, {}).get(filename, ''),
+                'raw_url': '%s:%s' % (sha, filename),
+            } for filename in commits[sha][2]],
+        } for sha in commit_urls]
+
+    def get_compare(self, repo_slug, base, head):
+        diff = self._run(['diff', '--no-renames', base, head])
+        return {'files': [{'filename': filename, 'patch': patch}
+                          for filename, patch in
+                          self._parse_diff(diff).items()]}
+
+    def get_raw_files(self, raw_urls):
+        contents = self.git_run.get_objects_content(raw_urls)
+        missing = [raw_url for raw_url in raw_urls if contents[raw_url] is None]
+        if missing:
+            raise ApiException('git objects not found: %s' % ', '.join(missing))
+        return [contents[raw_url] for raw_url in raw_urls]
+
+
+def get_backend(travis_build_dir=None):
+    """Return the backend to get the commits of the pull request.
+    With CHECK_TAGS_BACKEND=git they are read from the local clone of
+    travis_build_dir in the range of CHECK_TAGS_GIT_RANGE, by default the
+    parents of the merge commit tested by Travis for pull requests.
+    Otherwise the GitHub API is used"""
+    if os.environ.get('CHECK_TAGS_BACKEND') == 'git':
+        commit_range = os.environ.get('CHECK_TAGS_GIT_RANGE',
+                                      'HEAD^1..HEAD^2')
+        return LocalGitBackend(
+            GitRun(os.path.join(travis_build_dir, '.git')), commit_range)
+    return GitHubBackend(get_github_client())
 
 
 def get_errors_msgs_commits(travis_repo_slug, travis_pull_request_number, travis_branch, version, token, travis_build_dir, travis_pr_slug):
@@ -21,11 +200,21 @@ def get_errors_msgs_commits(travis_repo_slug, travis_pull_request_number, travis
     if not travis_pull_request_number or travis_pull_request_number == "false":
         return real_errors
     # GET / repos /: owner /:repo / commits
-    url_request = 'https://github.it-projects.info/repos/%s/pulls/%s/commits' % (str(travis_repo_slug), str(travis_pull_request_number))
-    resp = requests.get(url_request)
-    commits = resp.json()
-    if resp.status_code != 200:
-        print('GITHUB API response for commits: %s', [resp, resp.headers, commits])
+    with get_backend(travis_build_dir) as backend:
+        return _get_errors_msgs_commits(
+            travis_repo_slug, travis_pull_request_number, version,
+            symbol_in_branch, backend)
+
+
+def _get_errors_msgs_commits(travis_repo_slug, travis_pull_request_number,
+                             version, symbol_in_branch, backend):
+    real_errors = {}
+    try:
+        commits = backend.get_pull_commits(
+            travis_repo_slug, travis_pull_request_number)
+    except ApiException as error:
+        print('GITHUB API response for commits: %s' % error)
+        raise
     commit_url = {}
     sha_commits = []
     commits_order = []
@@ -47,7 +236,7 @@ def get_errors_msgs_commits(travis_repo_slug, travis_pull_request_number, travis
                 continue
             errors_commit = handler_commit(commit, symbol_in_branch, version)
             real_errors.update(errors_commit)
-    error_version_docs = check_stable_branch_docs(commit_url, sha_commits, travis_repo_slug, commits_order)
+    error_version_docs = check_stable_branch_docs(commit_url, sha_commits, travis_repo_slug, commits_order, backend)
     real_errors.update(error_version_docs)
     return real_errors
 
@@ -85,9 +274,9 @@ def handler_commit(commit, symbol_in_branch, version):
     return errors_commit
 
 
-def check_stable_branch_docs(commit_url, sha_commits, travis_repo_slug, commits_order):
+def check_stable_branch_docs(commit_url, sha_commits, travis_repo_slug, commits_order, backend):
     error_version_docs = {}
-    commit_filename_versions, commit_manifest = get_changed_version(commit_url, commits_order)
+    commit_filename_versions, commit_manifest = get_changed_version(commit_url, commits_order, backend)
     manifest_commits = {}
     for commit, manifest in commit_manifest:
         if manifest is None:
@@ -95,7 +284,7 @@ def check_stable_branch_docs(commit_url, sha_commits, travis_repo_slug, commits_
         manifest_commits.setdefault(manifest, [])
         manifest_commits[manifest].append(commit)
     # https://developer.github.com/v3/repos/commits/#compare-two-commits
-    manifest_version = get_manifest_version(travis_repo_slug, sha_commits)
+    manifest_version = get_manifest_version(travis_repo_slug, sha_commits, backend)
     if manifest_version != {}:
         for manifest, commit in manifest_commits.items():
             versions = manifest_version.get(manifest)
@@ -124,17 +313,17 @@ def check_changelog_index_readme(commit_filename_versions):
     return error_changelog_manifest_index_readme
 
 
-def get_manifest_version(travis_repo_slug, sha_commits):
+def get_manifest_version(travis_repo_slug, sha_commits, backend):
     manifest = '__manifest__.py'
     sha_start = sha_commits[0]
     sha_end = sha_commits[-1]
     # GET /repos/:owner/:repo/compare/:base...:head
-    url_request = 'https://github.it-projects.info/repos/{}/compare/{}~1...{}'.format(
-        str(travis_repo_slug), str(sha_start),  str(sha_end))
-    resp = requests.get(url_request)
-    compare = resp.json()
-    if resp.status_code != 200:
-        print('GITHUB API response for compare two commits: %s', [resp, resp.headers, compare])
+    try:
+        compare = backend.get_compare(
+            travis_repo_slug, '%s~1' % sha_start, sha_end)
+    except ApiException as error:
+        print('GITHUB API response for compare two commits: %s' % error)
+        raise
     updated_files = compare.get('files')
     manifest_versions = {}
     for file in updated_files:
@@ -259,7 +448,7 @@ def get_first_second_third_values(versions):
     return result
 
 
-def get_changed_version(commit_url, commits_order):
+def get_changed_version(commit_url, commits_order, backend):
     commits_order_filtered = []
     for commit in commits_order:
         if ':sparkles:' in commit or ':zap:' in commit or ':ambulance:' in commit:
@@ -267,11 +456,19 @@ def get_changed_version(commit_url, commits_order):
     tags = [':sparkles:', ':zap:', ':ambulance:']
     commit_filename_versions = {}
     commit_manifest = {}
-    for commit, url in commit_url.items():
+    # Get the details of all the commits and the changelogs updated
+    # at once
+    commit_contents = backend.get_commits(list(commit_url.values()))
+    raw_urls = [
+        file.get('raw_url')
+        for commit_content in commit_contents
+        if set(re.findall(r'^(:[^\s]+:)', commit_content.get('commit').get('message'))) & set(tags)
+        for file in commit_content.get('files')
+        if 'doc/changelog.rst' in file.get('filename') and
+        re.search(r'\+`(\d+.\d+.\d+)', file.get('patch') or '')]
+    raw_contents = dict(zip(raw_urls, backend.get_raw_files(raw_urls)))
+    for commit_content in commit_contents:
         filename_versions = {}
-        url = url.replace('api.github.com', 'github.it-projects.info')
-        commit_content = requests.get(url)
-        commit_content = commit_content.json()
         commit_msg = commit_content.get('commit').get('message')
         list_tags = re.findall(r'^(:[^\s]+:)', commit_msg)
         release_tag = list(set(list_tags) & set(tags))
@@ -287,9 +484,7 @@ def get_changed_version(commit_url, commits_order):
                 update_of_version_from_patch = re.search(r'\+`(\d+.\d+.\d+)', patch)
                 if update_of_version_from_patch:
                     update_of_version_from_patch = update_of_version_from_patch.group(1)
-                    raw_url = file.get('raw_url')
-                    resp = requests.get(raw_url)
-                    changelog_content = resp.text
+                    changelog_content = raw_contents[file.get('raw_url')]
                     versions = re.findall(r'(\d+.\d+.\d+)', changelog_content)
                     versions = [update_of_version_from_patch, versions[1]]
                     versions = sorted(versions)
@@ -6,10 +6,15 @@ With -m flag, will return a list of modules names instead.
 """
 
 import ast
+import hashlib
+import heapq
+import json
 import os
+import re
 import sys
 
 from git_run import GitRun
+from travis_helpers import get_cache_dir
 
 MANIFEST_FILES = [
     '__manifest__.py',
@@ -23,6 +28,157 @@ DOC_FILES = [
     'index.rst'
 ]
 
+# Files with translatable terms or translations of a module
+# The .pot files are the result of the export, not a source of it
+TRANSLATION_SOURCE_EXTENSIONS = ('.py', '.xml', '.js', '.csv', '.po')
+
+
+def _to_json(value):
+    """Return a literal value in a JSON-safe form keeping its types: the
+    containers are lists tagged with their type, and the str of py2 and the
+    bytes of py3 are tagged too"""
+    if isinstance(value, dict):
+        return ['dict'] + [[_to_json(key), _to_json(item)]
+                           for key, item in value.items()]
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [type(value).__name__] + [_to_json(item) for item in value]
+    if isinstance(value, bytes) and not isinstance(value, str):
+        return ['bytes', value.decode('latin-1')]
+    if isinstance(value, str) and not isinstance(value, type(u'')):
+        # str of py2
+        return ['str', value.decode('UTF-8')]
+    return value
+
+
+def _from_json(value):
+    """Return the literal value of the JSON-safe form of _to_json"""
+    if not isinstance(value, list):
+        return value
+    tag, items = value[0], value[1:]
+    if tag == 'dict':
+        return dict((_from_json(key), _from_json(item))
+                    for key, item in items)
+    if tag == 'bytes':
+        return items[0].encode('latin-1')
+    if tag == 'str':
+        return str(items[0].encode('UTF-8'))
+    return {'list': list, 'tuple': tuple, 'set': set,
+            'frozenset': frozenset}[tag](_from_json(item) for item in items)
+
+
+class ManifestIndex(object):
+    """On-disk index of parsed manifests.
+    Each entry is keyed by the absolute manifest path and stores the
+    mtime and size of the file when it was parsed, so a manifest is only
+    parsed again if it has changed since the last scan, even across builds
+    when the cache directory is preserved.
+    The manifests are stored in the JSON-safe form of _to_json, to return
+    the same values as `ast.literal_eval` (tuples, str on py2), and kept in
+    memory once parsed or decoded. The manifests returned are shared by
+    all the calls, they must not be modified.
+    """
+
+    def __init__(self, index_path=None):
+        """
+        :param index_path: JSON file where the index is stored.
+            If it is None, the index lives only in memory.
+        """
+        self.index_path = index_path
+        self.entries = None
+        self.dirty = False
+        # {path: (mtime, size, manifest)} of the manifests already returned
+        self.manifests = {}
+
+    def load(self):
+        self.entries = {}
+        if not self.index_path or not os.path.isfile(self.index_path):
+            return
+        try:
+            with open(self.index_path) as f_index:
+                self.entries = json.load(f_index)
+        except (IOError, OSError, ValueError):
+            # A corrupted index is just rebuilt from scratch
+            self.entries = {}
+        # Forget the manifests deleted since the index was saved
+        for manifest_path in list(self.entries):
+            if not os.path.isfile(manifest_path):
+                del self.entries[manifest_path]
+                self.dirty = True
+
+    def save(self):
+        """Write the index to disk if it has new entries.
+        The file is written in a temporary file and renamed to avoid
+        leaving a truncated index if several processes write it."""
+        if not self.dirty or not self.index_path:
+            return
+        tmp_path = '%s.%d.tmp' % (self.index_path, os.getpid())
+        try:
+            if not os.path.isdir(os.path.dirname(self.index_path)):
+                os.makedirs(os.path.dirname(self.index_path))
+            with open(tmp_path, 'w') as f_index:
+                json.dump(self.entries, f_index)
+            os.rename(tmp_path, self.index_path)
+        except (IOError, OSError):
+            # The index is only a cache, it must not break the build
+            return
+        self.dirty = False
+
+    def get(self, manifest_path):
+        """Return the parsed manifest, parsing it only if it was changed
+        :param manifest_path: Path of the manifest file
+        :return: Dict with the manifest content
+        """
+        if self.entries is None:
+            self.load()
+        manifest_path = os.path.abspath(manifest_path)
+        stat = os.stat(manifest_path)
+        file_key = (stat.st_mtime, stat.st_size)
+        cached = self.manifests.get(manifest_path)
+        if cached and cached[:2] == file_key:
+            return cached[2]
+        entry = self.entries.get(manifest_path)
+        if (entry and (entry['mtime'], entry['size']) == file_key and
+                'parsed' in entry):
+            manifest = _from_json(entry['parsed'])
+        else:
+            with open(manifest_path) as f_manifest:
+                manifest = ast.literal_eval(f_manifest.read())
+            self.entries[manifest_path] = {
+                'mtime': stat.st_mtime,
+                'size': stat.st_size,
+                'parsed': _to_json(manifest),
+            }
+            self.dirty = True
+        self.manifests[manifest_path] = file_key + (manifest,)
+        return manifest
+
+    def clear(self):
+        self.entries = {}
+        self.manifests = {}
+        self.dirty = True
+
+
+_manifest_index = None
+
+
+def get_manifest_index():
+    """Return the manifest index shared by the whole process.
+    The file is located in the MQT cache directory, set
+    `MQT_MANIFEST_INDEX=0` to keep the index only in memory."""
+    global _manifest_index
+    if _manifest_index is None:
+        index_path = None
+        if os.environ.get('MQT_MANIFEST_INDEX', '1') != '0':
+            index_path = get_cache_dir('manifest_index.json')
+        _manifest_index = ManifestIndex(index_path)
+    return _manifest_index
+
+
+def read_manifest(manifest_path):
+    """Return the content of a manifest file using the manifest index"""
+    return get_manifest_index().get(manifest_path)
+
+
 def is_module(path):
     """return False if the path doesn't contain an odoo module, and the full
     path to the module manifest otherwise"""
@@ -38,6 +194,93 @@ def is_module(path):
         return False
 
 
+def get_module_fingerprint(path, extensions=TRANSLATION_SOURCE_EXTENSIONS):
+    """Return a hash of the relative paths and contents of the files of a
+    module with one of the extensions
+    :param path: Path of the module
+    :param extensions: Tuple of extensions of the files to hash
+    :return: String with the hexadecimal sha1
+    """
+    sha = hashlib.sha1()
+    for root, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not filename.endswith(extensions):
+                continue
+            file_path = os.path.join(root, filename)
+            sha.update(os.path.relpath(file_path, path).encode('UTF-8'))
+            sha.update(b'\0')
+            with open(file_path, 'rb') as f_file:
+                sha.update(f_file.read())
+            sha.update(b'\0')
+    return sha.hexdigest()
+
+
+class ModuleFingerprints(object):
+    """On-disk store of the fingerprint of each module in the last
+    successful run of a task, to skip the modules that did not change
+    """
+
+    def __init__(self, path):
+        """
+        :param path: JSON file where the fingerprints are stored
+        """
+        self.path = path
+        self.fingerprints = {}
+        try:
+            with open(path) as f_fingerprints:
+                self.fingerprints = json.load(f_fingerprints)
+        except (IOError, OSError, ValueError):
+            pass
+
+    def get_changed(self, fingerprints):
+        """Return the modules with a fingerprint different than the stored
+        :param fingerprints: Dict {module: fingerprint} of the current run
+        :return: List of module names
+        """
+        return sorted(module for module, fingerprint in fingerprints.items()
+                      if self.fingerprints.get(module) != fingerprint)
+
+    def update(self, fingerprints):
+        """Store the fingerprints of the modules processed successfully
+        :param fingerprints: Dict {module: fingerprint}
+        """
+        self.fingerprints.update(fingerprints)
+        tmp_path = '%s.%d.tmp' % (self.path, os.getpid())
+        try:
+            if not os.path.isdir(os.path.dirname(self.path)):
+                os.makedirs(os.path.dirname(self.path))
+            with open(tmp_path, 'w') as f_fingerprints:
+                json.dump(self.fingerprints, f_fingerprints)
+            os.rename(tmp_path, self.path)
+        except (IOError, OSError):
+            # The fingerprints are only a cache, they must not break the build
+            pass
+
+
+def get_pot_fingerprints(path, modules, odoo_version):
+    """Return the store of the fingerprints of the modules whose POT files
+    were exported, and the current fingerprints of the modules.
+    :param path: Path of the repository with the modules
+    :param modules: List of module names
+    :param odoo_version: String with the Odoo version of the build
+    :return: Tuple (ModuleFingerprints, {module: fingerprint}).
+        The store is None if disabled with MQT_POT_CACHE=0
+    """
+    fingerprints = dict(
+        (module, get_module_fingerprint(os.path.join(path, module)))
+        for module in modules)
+    if os.environ.get('MQT_POT_CACHE', '1') == '0':
+        return None, fingerprints
+    # Each repository has its own store, they can have modules with the
+    # same name sharing the cache
+    repo = os.environ.get('TRAVIS_REPO_SLUG') or os.path.abspath(path)
+    store = ModuleFingerprints(get_cache_dir(
+        'pot_fingerprints', re.sub(r'[^\w.-]+', '_', repo).strip('_'),
+        '%s.json' % odoo_version))
+    return store, fingerprints
+
+
 def get_changelog_path(path):
     path += '/doc/'
     if not os.path.isdir(path):
@@ -66,7 +309,7 @@ def get_modules_info(path, depth=1):
         for module in os.listdir(path):
             manifest_path = is_module(os.path.join(path, module))
             if manifest_path:
-                manifest = ast.literal_eval(open(manifest_path).read())
+                manifest = read_manifest(manifest_path)
                 if manifest.get('installable', True):
                     modules[module] = {
                         'application': manifest.get('application'),
@@ -77,6 +320,7 @@ def get_modules_info(path, depth=1):
                 deeper_modules = get_modules_info(
                     os.path.join(path, module), depth-1)
                 modules.update(deeper_modules)
+    get_manifest_index().save()
     return modules
 
 
@@ -100,7 +344,7 @@ def get_versions_info(path, modules_pr, depth=1):
                     with open(changelog_path) as f_changelog:
                         changelog = f_changelog.readlines()
                     version_from_changelog = changelog[0]
-                manifest = ast.literal_eval(open(manifest_path).read())
+                manifest = read_manifest(manifest_path)
                 if manifest.get('installable', True):
                     modules[module] = {
                         'version_from_manifest': manifest.get('version'),
@@ -134,12 +378,9 @@ def get_addons(path, depth=1):
     return res
 
 
-def get_modules_changed(path, ref='HEAD'):
-    """Get modules changed from git diff-index {ref}
-    :param path: String path of git repo
-    :param ref: branch or remote/branch or sha to compare
-    :return: List of paths of modules changed
-    """
+def _get_items_changed(path, ref='HEAD'):
+    """Get the items changed from git diff-index {ref}, fetching ref first
+    if it isn't HEAD"""
     git_run_obj = GitRun(os.path.join(path, '.git'))
     if ref != 'HEAD':
         fetch_ref = ref
@@ -147,7 +388,16 @@ def get_modules_changed(path, ref='HEAD'):
             # to force create branch
             fetch_ref += ':' + fetch_ref
         git_run_obj.run(['fetch'] + fetch_ref.split('/', 1))
-    items_changed = git_run_obj.get_items_changed(ref)
+    return git_run_obj.get_items_changed(ref)
+
+
+def get_modules_changed(path, ref='HEAD'):
+    """Get modules changed from git diff-index {ref}
+    :param path: String path of git repo
+    :param ref: branch or remote/branch or sha to compare
+    :return: List of paths of modules changed
+    """
+    items_changed = _get_items_changed(path, ref)
     folders_changed = set([
         item_changed.split('/')[0]
         for item_changed in items_changed
@@ -161,58 +411,363 @@ def get_modules_changed(path, ref='HEAD'):
     return modules_changed_path
 
 
+def get_modules_paths(path):
+    """Get the installable modules at any depth of path, without looking
+    into the modules nor the hidden folders
+    :param path: Path of the modules
+    :return: Dict {module name: normalized path of the module}
+    """
+    modules = {}
+    for root, dirnames, _ in os.walk(path):
+        manifest_path = is_module(root)
+        if manifest_path:
+            dirnames[:] = []
+            if read_manifest(manifest_path).get('installable', True):
+                modules[os.path.basename(root)] = os.path.normpath(root)
+            continue
+        dirnames[:] = sorted(dirname for dirname in dirnames
+                             if not dirname.startswith('.'))
+    get_manifest_index().save()
+    return modules
+
+
+def get_module_path(path, modules_paths):
+    """Get the module of a file or folder, the nearest folder above it
+    (or itself) which is a module
+    :param path: Path of the file or folder
+    :param modules_paths: Iterable of normalized paths of the modules
+    :return: Normalized path of the module or None
+    """
+    modules_paths = set(modules_paths)
+    path = os.path.normpath(path)
+    while path not in modules_paths:
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    return path
+
+
+def get_files_changed(path, ref='HEAD', extensions=('.py',)):
+    """Get the files of the modules changed from git diff-index {ref}
+    :param path: String path of git repo
+    :param ref: branch or remote/branch or sha to compare
+    :param extensions: Tuple of extensions of the files to return
+    :return: List of normalized paths of the existing files changed
+    """
+    modules_paths = set(get_modules_paths(path).values())
+    files_changed = []
+    for item_changed in _get_items_changed(path, ref):
+        if not item_changed.endswith(extensions):
+            continue
+        file_path = os.path.normpath(os.path.join(path, item_changed))
+        if os.path.isfile(file_path) and \
+                get_module_path(file_path, modules_paths):
+            files_changed.append(file_path)
+    return files_changed
+
+
+def _get_addon_import_path(name, modules):
+    """Return the path of an `odoo.addons.<module>` import of the modules"""
+    parts = name.split('.')
+    if len(parts) < 3 or parts[0] not in ('odoo', 'openerp') or \
+            parts[1] != 'addons' or parts[2] not in modules:
+        return None
+    return os.path.join(modules[parts[2]], *parts[3:])
+
+
+def get_python_imports(file_path, modules):
+    """Get the python files of the modules imported by a file, from
+    relative imports and `odoo.addons` imports
+    :param file_path: Path of the python file
+    :param modules: Dict {module name: path of the module}
+    :return: Set of normalized paths of the imported files
+    """
+    try:
+        with open(file_path, 'rb') as f_py:
+            tree = ast.parse(f_py.read(), file_path)
+    except (SyntaxError, ValueError):
+        return set()
+    targets = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom):
+            if node.level:
+                base = os.path.dirname(file_path)
+                for _ in range(node.level - 1):
+                    base = os.path.dirname(base)
+                if node.module:
+                    base = os.path.join(base, *node.module.split('.'))
+            else:
+                base = _get_addon_import_path(node.module or '', modules)
+                if not base:
+                    continue
+            targets.append(base)
+            # `from package import name` can import the submodule name
+            targets.extend(os.path.join(base, alias.name)
+                           for alias in node.names)
+        elif isinstance(node, ast.Import):
+            targets.extend(filter(None, [
+                _get_addon_import_path(alias.name, modules)
+                for alias in node.names]))
+    imports = set()
+    for target in targets:
+        for candidate in (target + '.py', os.path.join(target, '__init__.py')):
+            if os.path.isfile(candidate):
+                imports.add(os.path.normpath(candidate))
+    imports.discard(os.path.normpath(file_path))
+    return imports
+
+
+def get_importers(path, files):
+    """Get the python files of the modules of path which import directly
+    any of the files
+    :param path: Path of the modules
+    :param files: List of paths of python files
+    :return: List of normalized paths of the importer files, without the
+        files
+    """
+    files = set(os.path.normpath(file_path) for file_path in files)
+    modules = get_modules_paths(path)
+    modules_paths = set(modules.values())
+    modules_files = set(
+        os.path.basename(get_module_path(file_path, modules_paths) or '')
+        for file_path in files) - set([''])
+    importers = []
+    for module, module_path in sorted(modules.items()):
+        for root, dirnames, filenames in os.walk(module_path):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                file_path = os.path.normpath(os.path.join(root, filename))
+                if not filename.endswith('.py') or file_path in files:
+                    continue
+                if module not in modules_files:
+                    # Other modules can only import the files through
+                    # `odoo.addons.<module>`, skip parsing the rest
+                    with open(file_path, 'rb') as f_py:
+                        content = f_py.read()
+                    if not any(('addons.' + module_file).encode('UTF-8')
+                               in content for module_file in modules_files):
+                        continue
+                if get_python_imports(file_path, modules) & files:
+                    importers.append(file_path)
+    return importers
+
+
+class DependencyCycleError(Exception):
+    """Raised when the dependencies of the modules form a cycle"""
+
+    def __init__(self, cycle):
+        super(DependencyCycleError, self).__init__(
+            'Dependency cycle found: %s' % ' -> '.join(cycle))
+        self.cycle = cycle
+
+
+class ModuleGraph(object):
+    """Dependency graph of the modules returned by get_modules_info.
+    It is built once and keeps an index of the reverse edges and the
+    transitive closures already computed, so querying the dependencies or
+    dependents of many modules doesn't walk the same branches again.
+    Dependencies that aren't in the modules dict are kept as leaf nodes.
+    """
+
+    def __init__(self, modules):
+        """
+        :param modules: Dict returned by get_modules_info
+        """
+        self.modules = modules
+        self.depends = {}
+        self.dependents = {}
+        for module, module_data in modules.items():
+            depends = module_data.get('depends') or []
+            self.depends[module] = list(depends)
+            self.dependents.setdefault(module, [])
+            for dependency in depends:
+                self.dependents.setdefault(dependency, []).append(module)
+                self.depends.setdefault(dependency, [])
+        self.auto_install_modules = sorted(
+            module for module, module_data in modules.items()
+            if module_data.get('auto_install'))
+        self._dependencies_cache = {}
+        self._dependents_cache = {}
+
+    def _closure(self, edges, cache, module_name):
+        if module_name in cache:
+            return cache[module_name]
+        result = set([module_name])
+        pending = [module_name]
+        while pending:
+            module = pending.pop()
+            for node in edges.get(module, []):
+                if node in result:
+                    continue
+                if node in cache:
+                    # The closure of node is already complete
+                    result |= cache[node]
+                else:
+                    result.add(node)
+                    pending.append(node)
+        result = frozenset(result)
+        cache[module_name] = result
+        return result
+
+    def get_dependencies(self, module_name):
+        """Return a set of all the dependencies in deep of the module_name.
+        The module_name is included in the result."""
+        return set(self._closure(
+            self.depends, self._dependencies_cache, module_name))
+
+    def get_dependents(self, module_name):
+        """Return a set of all the modules that are dependent of the
+        module_name. The module_name is included in the result."""
+        return set(self._closure(
+            self.dependents, self._dependents_cache, module_name))
+
+    def get_auto_install(self, to_install):
+        """Return the auto_install modules that would be installed along with
+        to_install, including the ones enabled by other auto_install modules.
+        Each auto_install module keeps a counter of its dependencies not yet
+        installed, so the closure is computed in a single pass over the
+        reverse edges of the modules added.
+        :param to_install: Iterable of modules to install
+        :return: Dict of {auto_install module: dependency that triggered it},
+            the dependency is None if all of them were already in to_install
+        """
+        to_install = set(to_install)
+        missing = {}
+        pending = []
+        result = {}
+        for module in self.auto_install_modules:
+            if module in to_install:
+                continue
+            missing[module] = len(set(self.depends[module]) - to_install)
+            if not missing[module]:
+                result[module] = None
+                pending.append(module)
+        while pending:
+            module = pending.pop()
+            for dependent in set(self.dependents.get(module, [])):
+                if not missing.get(dependent):
+                    continue
+                missing[dependent] -= 1
+                if not missing[dependent]:
+                    result[dependent] = module
+                    pending.append(dependent)
+        return result
+
+    def find_cycle(self):
+        """Return a list with the modules of a dependency cycle, where the
+        first and last items are the same module, or None without cycles."""
+        # 0: not visited, 1: in the current path, 2: done
+        state = dict.fromkeys(self.depends, 0)
+        for root in sorted(self.depends):
+            if state[root]:
+                continue
+            path = [root]
+            stack = [iter(sorted(self.depends[root]))]
+            state[root] = 1
+            while stack:
+                node = next(stack[-1], None)
+                if node is None:
+                    state[path.pop()] = 2
+                    stack.pop()
+                elif state[node] == 1:
+                    return path[path.index(node):] + [node]
+                elif state[node] == 0:
+                    state[node] = 1
+                    path.append(node)
+                    stack.append(iter(sorted(self.depends[node])))
+        return None
+
+    def topological_sort(self, module_names=None):
+        """Return the modules sorted so that every module is after its
+        dependencies. Modules at the same level are sorted by name.
+        :param module_names: Iterable of modules to sort, all the modules of
+            the graph by default
+        :raise DependencyCycleError: if the dependencies have a cycle
+        """
+        if module_names is None:
+            module_names = self.depends.keys()
+        module_names = set(module_names)
+        missing = dict(
+            (module, len(set(self.depends.get(module, [])) & module_names))
+            for module in module_names)
+        ready = [module for module, count in missing.items() if not count]
+        heapq.heapify(ready)
+        result = []
+        while ready:
+            module = heapq.heappop(ready)
+            result.append(module)
+            for dependent in set(self.dependents.get(module, [])):
+                if dependent not in missing:
+                    continue
+                missing[dependent] -= 1
+                if not missing[dependent]:
+                    heapq.heappush(ready, dependent)
+        if len(result) != len(module_names):
+            raise DependencyCycleError(self.find_cycle() or sorted(
+                set(module_names) - set(result)))
+        return result
+
+
+def get_module_graph(modules):
+    """Return modules as a ModuleGraph, building it if modules is
+    the dict returned by get_modules_info.
+    The functions below accept both. A graph built from a dict is discarded
+    after the call with the closures it computed, so the callers querying
+    several modules must build a ModuleGraph once and pass it."""
+    if isinstance(modules, ModuleGraph):
+        return modules
+    return ModuleGraph(modules)
+
+
 def get_dependencies(modules, module_name):
     """Return a set of all the dependencies in deep of the module_name.
-    The module_name is included in the result."""
-    result = set()
-    for dependency in modules.get(module_name, {}).get('depends', []):
-        result |= get_dependencies(modules, dependency)
-    return result | set([module_name])
+    The module_name is included in the result.
+    :param modules: ModuleGraph or dict, see get_module_graph"""
+    return get_module_graph(modules).get_dependencies(module_name)
 
 
 def get_dependents(modules, module_name):
     """Return a set of all the modules that are dependent of the module_name.
-    The module_name is included in the result."""
-    result = set()
-    for dependent in modules.keys():
-        if module_name in modules.get(dependent, {}).get('depends', []):
-            result |= get_dependents(modules, dependent)
-    return result | set([module_name])
+    The module_name is included in the result.
+    :param modules: ModuleGraph or dict, see get_module_graph"""
+    return get_module_graph(modules).get_dependents(module_name)
 
 
 def add_auto_install(modules, to_install):
     """ Append automatically installed glue modules to to_install if their
     dependencies are already present. to_install is a set. """
-    found = True
-    while found:
-        found = False
-        for module, module_data in modules.items():
-            if (module_data.get('auto_install') and
-                    module not in to_install and
-                    all(dependency in to_install
-                        for dependency in module_data.get('depends', []))):
-                found = True
-                to_install.add(module)
+    to_install.update(get_auto_install(modules, to_install))
     return to_install
 
 
+def get_auto_install(modules, to_install):
+    """Return a dict of {module: triggering dependency} with the automatically
+    installed glue modules that to_install would install.
+    See ModuleGraph.get_auto_install
+    :param modules: ModuleGraph or dict, see get_module_graph"""
+    return get_module_graph(modules).get_auto_install(to_install)
+
+
 def get_applications_with_dependencies(modules):
     """ Return all modules marked as application with their dependencies.
     For our purposes, l10n modules cannot be an application. """
+    graph = get_module_graph(modules)
     result = set()
-    for module, module_data in modules.items():
+    for module, module_data in graph.modules.items():
         if module_data.get('application') and not module.startswith('l10n_'):
-            result |= get_dependencies(modules, module)
-    return add_auto_install(modules, result)
+            result |= graph.get_dependencies(module)
+    return add_auto_install(graph, result)
 
 
 def get_localizations_with_dependents(modules):
     """ Return all localization modules with the modules that depend on them
     """
+    graph = get_module_graph(modules)
     result = set()
-    for module in modules.keys():
+    for module in graph.modules.keys():
         if module.startswith('l10n_'):
-            result |= get_dependents(modules, module)
+            result |= graph.get_dependents(module)
     return result
 
 
@@ -251,14 +806,15 @@ def main(argv=None):
         for path in params:
             modules.update(get_modules_info(path))
         res = set(modules.keys())
+        graph = ModuleGraph(modules)
         applications, localizations = set(), set()
         if application is True or application is False:
-            applications = get_applications_with_dependencies(modules)
+            applications = get_applications_with_dependencies(graph)
             if not application:
                 res -= applications
                 applications = set()
         if localization is True or localization is False:
-            localizations = get_localizations_with_dependents(modules)
+            localizations = get_localizations_with_dependents(graph)
             if not localization:
                 res -= localizations
                 localizations = set()
@@ -9,6 +9,14 @@ class GitRun(object):
     def __init__(self, repo_path, debug=False):
         self.repo_path = repo_path
         self.debug = debug
+        # Long-lived `git cat-file` processes by option
+        self._cat_files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     def run(self, command):
         """Execute git command in bash
@@ -25,6 +33,92 @@ class GitRun(object):
             res = res.strip('\n')
         return res
 
+    def close(self):
+        """Stop the `git cat-file` processes started by the batch methods"""
+        for process in self._cat_files.values():
+            process.stdin.close()
+            process.wait()
+            process.stdout.close()
+        self._cat_files = {}
+
+    def _cat_file(self, option, revision):
+        """Query an object to a persistent `git cat-file` process, started
+        the first time
+        :param option: "--batch" or "--batch-check"
+        :param revision: String with the object, e.g. "HEAD:README.md"
+        :return: Tuple (sha, type, size, content) or None if the object is
+            missing. content is None for "--batch-check".
+        """
+        process = self._cat_files.get(option)
+        if process is None:
+            cmd = ['git', '--git-dir=' + self.repo_path, 'cat-file', option]
+            print(cmd if self.debug else '')
+            process = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            self._cat_files[option] = process
+        process.stdin.write(revision.encode('UTF-8') + b'\n')
+        process.stdin.flush()
+        header = process.stdout.readline().decode('UTF-8').split()
+        if len(header) != 3:
+            # "<revision> missing" or "<revision> ambiguous"
+            return None
+        sha, object_type, size = header[0], header[1], int(header[2])
+        content = None
+        if option == '--batch':
+            content = process.stdout.read(size)
+            process.stdout.read(1)
+        return sha, object_type, size, content
+
+    def get_objects_info(self, revisions):
+        """Get the sha, type and size of several objects with one
+        `git cat-file --batch-check` process
+        :param revisions: List of revisions, e.g. ["HEAD", "HEAD:README.md"]
+        :return: Dict {revision: (sha, type, size)}, None for missing objects
+        """
+        res = {}
+        for revision in revisions:
+            info = self._cat_file('--batch-check', revision)
+            res[revision] = info and info[:3]
+        return res
+
+    def get_objects_content(self, revisions):
+        """Get the content of several objects with one `git cat-file --batch`
+        process
+        :param revisions: List of revisions, e.g. ["HEAD:README.md"]
+        :return: Dict {revision: String content}, None for missing objects
+        """
+        res = {}
+        for revision in revisions:
+            info = self._cat_file('--batch', revision)
+            res[revision] = info and info[3].decode('UTF-8')
+        return res
+
+    def get_last_commit_timestamps(self, paths, ref='HEAD'):
+        """Get the timestamp of the last commit changing each path walking
+        the history only once.
+        This is a wrapper method of git command:
+            git log --format=%ct --name-only {ref} -- {paths}
+        :param paths: List of paths relative to the root of the repository
+        :param ref: String of branch or sha where the history starts
+        :return: Dict {path: Integer unix timestamp of the committer date},
+            the paths without commits are not included
+        """
+        paths = set(paths)
+        if not paths:
+            return {}
+        command = ['-c', 'core.quotePath=false', 'log', '--format=%x1e%ct',
+                   '--name-only', '--no-renames', ref, '--'] + sorted(paths)
+        res = self.run(command) or ''
+        timestamps = {}
+        for chunk in res.split('\x1e')[1:]:
+            lines = chunk.splitlines()
+            for path in lines[1:]:
+                if path in paths and path not in timestamps:
+                    timestamps[path] = int(lines[0])
+            if len(timestamps) == len(paths):
+                break
+        return timestamps
+
     def get_items_changed(self, base_ref='HEAD'):
         """Get name of items changed in self.repo_path
         This is a wrapper method of git command:
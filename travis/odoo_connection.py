@@ -54,6 +54,41 @@ class _OdooBaseContext(object):
         buffer.close()
         return tmp
 
+    def export_pots(self, addons, get_filename, lang=None):
+        """
+        Export source translation files from several addons generating the
+        terms of all of them in one pass. Each .pot file is written as soon
+        as it is rendered, without keeping the contents of the others.
+        trans_export has no argument for the terms already generated, so the
+        trans_generate function of odoo is replaced by one returning them
+        while each addon is rendered: this is not thread safe, but the
+        original function is restored before the generator yields.
+        :param list addons: Addon names
+        :param get_filename: Function returning the .pot path of an addon
+        :returns: Generator of tuples (addon, filename) of the written files
+        """
+        translate = sys.modules[self.trans_export.__module__]
+        trans_generate = translate.trans_generate
+        rows_by_addon = {}
+        for row in trans_generate(lang, list(addons), self.cr):
+            rows_by_addon.setdefault(row[0], []).append(row)
+
+        def get_addon_rows(lang, modules, cr):
+            return rows_by_addon.pop(modules[0], [])
+
+        for addon in addons:
+            filename = get_filename(addon)
+            translate.trans_generate = get_addon_rows
+            try:
+                pot_contents = self.get_pot_contents(addon, lang)
+            finally:
+                translate.trans_generate = trans_generate
+            mode = 'w' if isinstance(pot_contents, str) else 'wb'
+            with open(filename, mode) as f_pot:
+                f_pot.write(pot_contents)
+            del pot_contents
+            yield addon, filename
+
     def load_po(self, po, lang):
         self.trans_load_data(self.cr, po, 'po', lang)
 
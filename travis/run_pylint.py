@@ -3,7 +3,9 @@
 
 from __future__ import print_function
 
-import ast
+import hashlib
+import json
+import multiprocessing
 import os
 import re
 import sys
@@ -11,9 +13,13 @@ import inspect
 
 import click
 import pylint.lint
+from pylint.reporters.text import ColorizedTextReporter, \
+    ParseableTextReporter, TextReporter, VSTextReporter
 
 import travis_helpers
-from getaddons import get_modules_changed, is_module
+from getaddons import ModuleGraph, get_files_changed, get_importers, \
+    get_module_path, get_modules_changed, get_modules_paths, is_module, \
+    read_manifest
 from git_run import GitRun
 
 try:
@@ -21,6 +27,11 @@ try:
 except ImportError:
     import configparser as ConfigParser
 
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
 CLICK_DIR = click.Path(exists=True, dir_okay=True, resolve_path=True)
 
 
@@ -127,6 +138,20 @@ def get_beta_msgs_addons_dev_pr():
     return list_enable_checks_addons_dev_pr
 
 
+def get_enabled_msgs(cfg):
+    """Get the messages enabled in a pylint configuration file
+    :param cfg: String path of pylint configuration file
+    :return: Set of strings with message names"""
+    config = ConfigParser.ConfigParser()
+    config.readfp(open(cfg))
+    if not config.has_option('MESSAGES CONTROL', 'enable'):
+        return set()
+    return set(
+        msg.strip()
+        for msg in config.get('MESSAGES CONTROL', 'enable').split(',')
+        if msg.strip() and not msg.strip().startswith('#'))
+
+
 def get_modules_cmd(dir):
     modules_cmd = []
     include_lint = os.environ.get('INCLUDE_LINT')
@@ -153,11 +178,40 @@ def version_validate(version, dir):
     return version
 
 
-def get_branch_base():
-    branch_base = os.environ.get('TRAVIS_BRANCH') or os.environ.get('VERSION')
-    if branch_base != 'HEAD':
-        branch_base = 'origin/' + (branch_base and branch_base or '')
-    return branch_base
+def get_files_changed_to_lint(dir, branch_base):
+    """Get the python files changed from branch_base in the modules not
+    excluded and inside the INCLUDE_LINT paths if any, the python files
+    which import them and the `__init__.py` of their modules, which
+    pylint-odoo needs to run the checks of the whole module, e.g. of the
+    manifest and the data files
+    :return: List of paths of python files
+    """
+    exclude = os.environ.get('EXCLUDE', '').split(',')
+    include = [os.path.join(os.path.abspath(path), '') for path in
+               os.environ.get('INCLUDE_LINT', '').split()]
+    modules_paths = set(get_modules_paths(dir).values())
+
+    def is_excluded(file_path):
+        if include and not any(os.path.abspath(file_path).startswith(path)
+                               for path in include):
+            return True
+        return os.path.basename(
+            get_module_path(file_path, modules_paths) or '') in exclude
+
+    files_changed = [
+        file_changed for file_changed in get_files_changed(dir, branch_base)
+        if not is_excluded(file_changed)]
+    if not files_changed:
+        return []
+    files_to_lint = files_changed + [
+        importer for importer in get_importers(dir, files_changed)
+        if not is_excluded(importer)]
+    for file_path in list(files_to_lint):
+        module_init = os.path.join(
+            get_module_path(file_path, modules_paths), '__init__.py')
+        if module_init not in files_to_lint:
+            files_to_lint.append(module_init)
+    return files_to_lint
 
 
 def pylint_run(is_pr, version, dir):
@@ -177,7 +231,33 @@ def pylint_run(is_pr, version, dir):
     disable_pylint = os.environ.get('DISABLE_PYLINT')
     modules_cmd = get_modules_cmd(dir)
     beta_msgs = get_beta_msgs()
-    branch_base = get_branch_base()
+    branch_base = travis_helpers.get_branch_base()
+    modules_changed = None
+    if os.environ.get('LINT_CHANGED_FILES') == '1':
+        # Lint only the python files changed and the ones importing them
+        modules_changed = get_files_changed_to_lint(dir, branch_base)
+        if not modules_changed:
+            print(travis_helpers.green(
+                'There are not python files changed from '
+                '"git --git-dir=%s diff ..%s"' % (dir, branch_base)))
+            return {}
+        modules_cmd = []
+        for file_changed in modules_changed:
+            modules_cmd.extend(['--path', file_changed])
+    if is_pr and os.environ.get('PYLINT_SINGLE_PASS') == '1':
+        if modules_changed is None:
+            modules_changed = get_modules_changed(dir, branch_base)
+        if modules_changed:
+            # The messages are counted by module, not by file
+            modules_paths = set(get_modules_paths(dir).values())
+            modules_changed_paths = sorted(set(filter(None, [
+                get_module_path(path, modules_paths)
+                for path in modules_changed])))
+            res = pylint_run_single_pass(
+                pylint_rcfile, pylint_rcfile_pr, modules_cmd,
+                modules_changed_paths, odoo_version, disable_pylint)
+            if res is not None:
+                return res
     extra_params_cmd = get_extra_params(odoo_version, disable_pylint)
     extra_info = "extra_params_cmd %s " % extra_params_cmd
     print(extra_info)
@@ -194,7 +274,8 @@ def pylint_run(is_pr, version, dir):
     if is_pr:
         print(travis_helpers.green(
             'Starting lint check only for modules changed'))
-        modules_changed = get_modules_changed(dir, branch_base)
+        if modules_changed is None:
+            modules_changed = get_modules_changed(dir, branch_base)
         if not modules_changed:
             print(travis_helpers.green(
                 'There are not modules changed from '
@@ -221,15 +302,138 @@ def pylint_run(is_pr, version, dir):
             if pr_errors < 0:
                 res = pr_stats
             else:
-                new_dict = {}
-                for val in res:
-                    new_dict[val] = (new_dict.get(val, 0) + res[val])
-                for val in pr_stats:
-                    new_dict[val] = (new_dict.get(val, 0) + pr_stats[val])
-                res = new_dict
+                res = add_stats(res, pr_stats)
+    return res
+
+
+def add_stats(stats, other_stats):
+    """Sum two dicts of {message: count}"""
+    res = dict(stats)
+    for key, value in other_stats.items():
+        res[key] = res.get(key, 0) + value
     return res
 
 
+def get_config_options(cfg):
+    """Get the options of a pylint configuration file, but the messages
+    enabled
+    :param cfg: String path of pylint configuration file
+    :return: Dict of {option: value}, `_` in the names replaced by `-`
+    """
+    config = ConfigParser.RawConfigParser()
+    config.read(cfg)
+    return dict(
+        (option.replace('_', '-'), value)
+        for section in config.sections()
+        for option, value in config.items(section) if option != 'enable')
+
+
+def get_extra_params_msgs(extra_params_cmd):
+    """Get the messages enabled by the `--enable=` params of
+    get_extra_params
+    :return: Set of strings with message names"""
+    msgs = set()
+    for param in extra_params_cmd:
+        if param.startswith('--enable='):
+            msgs.update(msg.strip() for msg in
+                        param[len('--enable='):].split(',') if msg.strip())
+    return msgs
+
+
+def get_options_msgs(options):
+    """Get the messages of the pylint and pylint-odoo checkers which use
+    any of the options
+    :param options: Set of option names, with `-` instead of `_`
+    :return: Set of message names, or None if an option isn't used by a
+        checker but by pylint itself, so it can change any message
+    """
+    linter = pylint.lint.PyLinter()
+    linter.load_default_plugins()
+    linter.load_plugin_modules(['pylint_odoo'])
+    msgs, checker_options = set(), set()
+    for checker in linter.get_checkers():
+        if checker is linter:
+            continue
+        names = set(name.replace('_', '-')
+                    for name, _ in getattr(checker, 'options', ()))
+        checker_options |= names
+        if names & options:
+            msgs.update(msg[1] for msg in checker.msgs.values())
+    if options - checker_options:
+        return None
+    return msgs
+
+
+def pylint_run_single_pass(pylint_rcfile, pylint_rcfile_pr, modules_cmd,
+                           modules_changed, odoo_version, disable_pylint):
+    """Lint a pull request running pylint only once.
+    Instead of linting all the modules with the global configuration file
+    and then the modules changed again with the pull request configuration
+    file, pylint is run with the pull request configuration file enabling
+    also the messages of the global one. Then each message is attributed to
+    the configuration files which enable it: the global ones are counted in
+    all the modules and the pull request ones only in the modules changed,
+    same as two separated runs.
+    The global messages are checked with the options of the pull request
+    configuration file, so the single pass is only possible if the options
+    which differ between the files aren't used by the checkers of the
+    global messages.
+    :return: Dict of {message: count} without beta messages, or None if
+        the two runs are needed
+    """
+    global_msgs = get_enabled_msgs(pylint_rcfile)
+    global_options = get_config_options(pylint_rcfile)
+    pr_options = get_config_options(pylint_rcfile_pr)
+    options_changed = set(
+        option for option in set(global_options) | set(pr_options)
+        if global_options.get(option) != pr_options.get(option))
+    if options_changed:
+        options_msgs = get_options_msgs(options_changed)
+        if options_msgs is None or options_msgs & global_msgs:
+            print(travis_helpers.yellow(
+                "The options %s of the pylint configuration files differ, "
+                "linting the modules changed in a second run" %
+                ', '.join(sorted(options_changed))))
+            return None
+    # The extra params of each run enable its beta messages
+    global_beta_msgs = get_beta_msgs()
+    global_extra_params = get_extra_params(odoo_version, disable_pylint)
+    global_msgs |= get_extra_params_msgs(global_extra_params)
+    travis_repo_slug = os.environ.get('TRAVIS_REPO_SLUG')
+    is_addons_dev = re.search(r'addons-dev', str(travis_repo_slug))
+    pr_beta_msgs = get_beta_msgs()
+    if is_addons_dev:
+        pr_beta_msgs += get_beta_msgs_addons_dev_pr()
+    extra_params_cmd = get_extra_params(
+        odoo_version, disable_pylint, is_addons_dev, True)
+    pr_msgs = get_enabled_msgs(pylint_rcfile_pr) | get_extra_params_msgs(
+        extra_params_cmd)
+    print("extra_params_cmd %s " % extra_params_cmd)
+    cmd = (["--config-file=%s" % pylint_rcfile_pr] + modules_cmd +
+           ['--extra-params', '--enable=%s' % ','.join(sorted(global_msgs))] +
+           extra_params_cmd + ['--msgs-by-module'])
+    real_errors = main(cmd, standalone_mode=False)
+    modules_changed = set(
+        os.path.basename(module_changed) for module_changed in modules_changed)
+    res, pr_stats = {}, {}
+    for module, module_msgs in (real_errors.get('by_module_msg') or {}).items():
+        for msg, count in module_msgs.items():
+            # Messages not enabled by any file (e.g. fatal) are reported by
+            # both runs
+            if (msg in global_msgs or msg not in pr_msgs) and \
+                    msg not in global_beta_msgs:
+                res[msg] = res.get(msg, 0) + count
+            if module in modules_changed and (
+                    msg in pr_msgs or msg not in global_msgs) and \
+                    msg not in pr_beta_msgs:
+                pr_stats[msg] = pr_stats.get(msg, 0) + count
+    print("count_errors %s" % sum(res.values()))
+    if pr_stats:
+        print(travis_helpers.yellow(
+            "Found %s errors in modules changed." % sum(pr_stats.values())))
+    return add_stats(res, pr_stats)
+
+
 def get_count_fails(linter_stats, msgs_no_count=None):
     """Verify the dictionary statistics to get number of errors.
     :param linter_stats: Dict of type pylint.lint.Run().linter.stats
@@ -247,7 +451,7 @@ def is_installable_module(path):
     otherwise the full path to the module's manifest"""
     manifest_path = is_module(path)
     if manifest_path:
-        manifest = ast.literal_eval(open(manifest_path).read())
+        manifest = read_manifest(manifest_path)
         if manifest.get('installable', True):
             return manifest_path
     return False
@@ -256,7 +460,7 @@ def is_installable_module(path):
 def get_subpaths(paths, depth=1):
     """Get list of subdirectories
     if `__init__.py` file doesn't exists in root path, then
-    get subdirectories.
+    get subdirectories. Paths of python files are kept.
     Why? More info here:
         https://www.mail-archive.com/code-quality@python.org/msg00294.html
     :param paths: List of paths
@@ -267,6 +471,11 @@ def get_subpaths(paths, depth=1):
     for path in paths:
         if depth < 0:
             continue
+        if os.path.isfile(path):
+            # Python files are linted alone
+            if path.endswith('.py'):
+                subpaths.append(path)
+            continue
         if not os.path.isfile(os.path.join(path, '__init__.py')):
             new_subpaths = [os.path.join(path, item)
                             for item in os.listdir(path)
@@ -279,13 +488,285 @@ def get_subpaths(paths, depth=1):
     return subpaths
 
 
-def run_pylint(paths, cfg, beta_msgs=None, sys_paths=None, extra_params=None):
+def get_count_py_files(path):
+    """Return the number of python files found inside path"""
+    return sum(len([fname for fname in files if fname.endswith('.py')])
+               for _root, _dirs, files in os.walk(path))
+
+
+def split_subpaths(subpaths, jobs):
+    """Split the module paths in balanced shards by number of python files.
+    The biggest modules are assigned first, each one to the shard with less
+    files so far.
+    :param subpaths: List of paths of modules
+    :param jobs: Max number of shards
+    :return: List of lists of paths, keeping the original order in each one
+    """
+    jobs = max(min(jobs, len(subpaths)), 1)
+    shards = [[] for _ in range(jobs)]
+    shard_sizes = [0] * jobs
+    sizes = dict((path, get_count_py_files(path)) for path in subpaths)
+    for path in sorted(subpaths, key=lambda path: -sizes[path]):
+        index = shard_sizes.index(min(shard_sizes))
+        shards[index].append(path)
+        shard_sizes[index] += sizes[path]
+    return [sorted(shard, key=subpaths.index) for shard in shards if shard]
+
+
+def merge_stats(stats_list):
+    """Merge the stats of several pylint runs summing their counters,
+    e.g. the `by_msg` dictionaries.
+    :param stats_list: List of dicts of type pylint.lint.Run().linter.stats
+    :return: Dict with the merged stats
+    """
+    res = {}
+    for stats in stats_list:
+        for key, value in stats.items():
+            if isinstance(value, dict):
+                res[key] = merge_stats([res.get(key) or {}, value])
+            elif isinstance(value, list):
+                res[key] = (res.get(key) or []) + value
+            elif (isinstance(value, int) and
+                    not isinstance(value, bool) and
+                    isinstance(res.get(key, 0), int)):
+                res[key] = res.get(key, 0) + value
+            else:
+                res[key] = value
+    return res
+
+
+# Text reporters of the pylint output formats
+TEXT_REPORTERS = {
+    'colorized': ColorizedTextReporter,
+    'msvs': VSTextReporter,
+    'parseable': ParseableTextReporter,
+    'text': TextReporter,
+}
+
+
+def get_output_format(cmd):
+    """Return the pylint output format of the params, given with
+    `--output-format=` or in the configuration file of `--rcfile=`"""
+    output_format = None
+    for param in cmd:
+        if param.startswith('--output-format='):
+            output_format = param[len('--output-format='):]
+    for param in cmd:
+        if output_format is None and param.startswith('--rcfile='):
+            config = ConfigParser.RawConfigParser()
+            config.read(param[len('--rcfile='):])
+            for section in config.sections():
+                if config.has_option(section, 'output-format'):
+                    output_format = config.get(section, 'output-format')
+    return output_format or 'text'
+
+
+class ModuleMessagesReporter(object):
+    """Mixin of a text reporter which also counts the messages of each odoo
+    module (the top package of the python module linted) and keeps the
+    lines written for them, to show them again as they were"""
+
+    def __init__(self, output=None):
+        super(ModuleMessagesReporter, self).__init__(output)
+        self.by_module_msg = {}
+        self.module_messages = {}
+        self._module = None
+
+    def handle_message(self, msg):
+        self._module = msg.module.split('.')[0]
+        module_msgs = self.by_module_msg.setdefault(self._module, {})
+        module_msgs[msg.symbol] = module_msgs.get(msg.symbol, 0) + 1
+        try:
+            super(ModuleMessagesReporter, self).handle_message(msg)
+        finally:
+            self._module = None
+
+    def writeln(self, string=''):
+        if self._module is not None:
+            self.module_messages.setdefault(self._module, []).append(string)
+        super(ModuleMessagesReporter, self).writeln(string)
+
+
+def get_module_messages_reporter(cmd):
+    """Return a ModuleMessagesReporter writing as the reporter of the
+    output format of the pylint params, the text one if it isn't a text
+    format"""
+    reporter_class = TEXT_REPORTERS.get(get_output_format(cmd), TextReporter)
+    return type('ModuleMessagesReporter',
+                (ModuleMessagesReporter, reporter_class), {})()
+
+
+def get_package_version(name):
+    """Return the version of an installed python package or None"""
+    try:
+        import pkg_resources
+        return pkg_resources.get_distribution(name).version
+    except Exception:
+        return None
+
+
+class PylintCache(object):
+    """On-disk cache of the pylint results of each odoo module.
+    The key of a module is a hash of the content of all its files, the
+    pylint params (including the content of the configuration file) and the
+    versions of python, pylint and pylint-odoo, so a module is only linted
+    again if something that can change its result has changed.
+    The content of the modules linted it depends on is part of the key too,
+    as checks like the ones of the manifest dependencies or the xml ids use
+    them. Checks that compare modules without dependencies between them
+    (e.g. duplicate-code) are computed only with the modules linted in the
+    same run.
+    """
+    # Version of the format of the results stored
+    VERSION = '2'
+
+    def __init__(self, cache_dir, cmd, sys_paths=None):
+        """
+        :param cache_dir: Directory where the results are stored
+        :param cmd: List of pylint params without the paths to check
+        :param sys_paths: List of paths appended to sys path
+        """
+        self.cache_dir = cache_dir
+        params_hash = hashlib.sha1(self.VERSION.encode('UTF-8'))
+        for param in cmd:
+            params_hash.update(param.encode('UTF-8'))
+            if param.startswith('--rcfile='):
+                with open(param[len('--rcfile='):], 'rb') as f_cfg:
+                    params_hash.update(f_cfg.read())
+        for value in [sys.version, get_package_version('pylint'),
+                      get_package_version('pylint-odoo')] + \
+                list(sys_paths or []):
+            params_hash.update(str(value).encode('UTF-8'))
+        self.params_hash = params_hash.hexdigest()
+
+    def get_keys(self, paths):
+        """Return the key of each module path: the hash of the module with
+        the hashes of the modules of paths it depends on
+        :param paths: List of paths of the modules linted
+        :return: Dict {path: key}
+        """
+        paths_by_module = dict(
+            (os.path.basename(path), path) for path in paths)
+        modules = {}
+        for module, path in paths_by_module.items():
+            manifest_path = is_module(path)
+            modules[module] = {'depends': read_manifest(
+                manifest_path).get('depends') if manifest_path else []}
+        graph = ModuleGraph(modules)
+        hashes = dict((path, self.get_key(path)) for path in paths)
+        keys = {}
+        for module, path in paths_by_module.items():
+            key = hashlib.sha1(hashes[path].encode('UTF-8'))
+            for dependency in sorted(graph.get_dependencies(module)):
+                if dependency != module and dependency in paths_by_module:
+                    key.update(dependency.encode('UTF-8'))
+                    key.update(hashes[paths_by_module[dependency]].encode(
+                        'UTF-8'))
+            keys[path] = key.hexdigest()
+        return keys
+
+    def get_key(self, path):
+        """Return the hash of the module in path with the pylint params"""
+        module_hash = hashlib.sha1(self.params_hash.encode('UTF-8'))
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(
+                dirname for dirname in dirs if not dirname.startswith('.'))
+            for fname in sorted(files):
+                if fname.endswith(('.pyc', '.pyo')):
+                    continue
+                fpath = os.path.join(root, fname)
+                module_hash.update(
+                    os.path.relpath(fpath, path).encode('UTF-8'))
+                with open(fpath, 'rb') as f_module:
+                    module_hash.update(f_module.read())
+        return module_hash.hexdigest()
+
+    def get(self, key):
+        """Return the results of a module stored with key or None"""
+        try:
+            with open(os.path.join(self.cache_dir, key + '.json')) as f_res:
+                return json.load(f_res)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def set(self, key, result):
+        """Store the results of a module. result is a dict with the keys
+        `by_msg` and `messages`"""
+        tmp_path = os.path.join(
+            self.cache_dir, '%s.%d.tmp' % (key, os.getpid()))
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            with open(tmp_path, 'w') as f_res:
+                json.dump(result, f_res)
+            os.rename(tmp_path, os.path.join(self.cache_dir, key + '.json'))
+        except (IOError, OSError):
+            # The cache must not break the lint check
+            pass
+
+
+def pylint_lint_run(cmd, msgs_by_module=False):
+    """Run pylint in this process without exiting
+    :param cmd: List of pylint params
+    :param msgs_by_module: Add the count of messages of each odoo module
+        in the `by_module_msg` key of the stats
+    :return: Dict with python linter stats
+    """
+    kwargs = {}
+    if msgs_by_module:
+        kwargs['reporter'] = get_module_messages_reporter(cmd)
+        # The reporter writes in the output format, which would replace it
+        cmd = [param for param in cmd
+               if not param.startswith('--output-format=')]
+    if 'do_exit' in inspect.getargspec(pylint.lint.Run.__init__)[0]:
+        # pylint has renamed this keyword argument
+        pylint_res = pylint.lint.Run(cmd, do_exit=False, **kwargs)
+    else:
+        pylint_res = pylint.lint.Run(cmd, exit=False, **kwargs)
+    if msgs_by_module:
+        pylint_res.linter.stats['by_module_msg'] = \
+            kwargs['reporter'].by_module_msg
+        pylint_res.linter.stats['module_messages'] = \
+            kwargs['reporter'].module_messages
+    return pylint_res.linter.stats
+
+
+def _pylint_lint_run_buffered(args):
+    """Run pylint in a worker process capturing its output, so the output
+    of the shards isn't interleaved.
+    :param args: Tuple of (pylint params, paths to append to sys path,
+        msgs_by_module)
+    :return: Tuple of (linter stats, string output)
+    """
+    cmd, sys_paths, msgs_by_module = args
+    for sys_path in sys_paths:
+        if sys_path not in sys.path:
+            sys.path.append(sys_path)
+    output = StringIO()
+    sys.stdout = output
+    try:
+        stats = pylint_lint_run(cmd, msgs_by_module)
+    finally:
+        sys.stdout = sys.__stdout__
+    return stats, output.getvalue()
+
+
+def run_pylint(paths, cfg, beta_msgs=None, sys_paths=None, extra_params=None,
+               jobs=1, msgs_by_module=False, use_cache=False):
     """Execute pylint command from original python library
     :param paths: List of paths of python modules to check with pylint
     :param cfg: String name of pylint configuration file
     :param sys_paths: List of paths to append to sys path
     :param extra_params: List of extra parameters to append
         in pylint command
+    :param jobs: Number of processes to lint the modules in parallel.
+        The modules are split in shards balanced by number of files and
+        the stats of each shard are merged. Checks that compare several
+        modules (e.g. duplicate-code) only see the modules of their shard.
+    :param msgs_by_module: Add the count of messages of each odoo module
+        in the `by_module_msg` key of the stats
+    :param use_cache: Get the results of the modules not changed since a
+        previous run from the PylintCache, lint only the other ones.
     :return: Dict with python linter stats
     """
     if sys_paths is None:
@@ -303,13 +784,62 @@ def run_pylint(paths, cfg, beta_msgs=None, sys_paths=None, extra_params=None):
                 if os.path.basename(path) not in exclude]
     if not subpaths:
         return {'error': 0}
-    cmd.extend(subpaths)
-    if 'do_exit' in inspect.getargspec(pylint.lint.Run.__init__)[0]:
-        # pylint has renamed this keyword argument
-        pylint_res = pylint.lint.Run(cmd, do_exit=False)
-    else:
-        pylint_res = pylint.lint.Run(cmd, exit=False)
-    return pylint_res.linter.stats
+    # The cache stores the results of whole modules
+    if not use_cache or any(os.path.isfile(path) for path in subpaths):
+        return run_pylint_subpaths(
+            cmd, subpaths, sys_paths, jobs, msgs_by_module)
+    cache = PylintCache(
+        travis_helpers.get_cache_dir('pylint'), cmd, sys_paths)
+    keys = cache.get_keys(subpaths)
+    cached_stats = []
+    subpaths_to_lint = []
+    for path in subpaths:
+        result = cache.get(keys[path])
+        if result is None:
+            subpaths_to_lint.append(path)
+            continue
+        module = os.path.basename(path)
+        print(travis_helpers.green(
+            "Using cached pylint results for %s" % module))
+        for message in result['messages']:
+            print(message)
+        cached_stats.append({
+            'by_msg': result['by_msg'],
+            'by_module_msg': {module: result['by_msg']},
+            'module_messages': {module: result['messages']},
+        })
+    stats = {}
+    if subpaths_to_lint:
+        stats = run_pylint_subpaths(
+            cmd, subpaths_to_lint, sys_paths, jobs, True)
+        for path in subpaths_to_lint:
+            module = os.path.basename(path)
+            cache.set(keys[path], {
+                'by_msg': stats['by_module_msg'].get(module, {}),
+                'messages': stats['module_messages'].get(module, []),
+            })
+    return merge_stats([stats] + cached_stats)
+
+
+def run_pylint_subpaths(cmd, subpaths, sys_paths, jobs=1,
+                        msgs_by_module=False):
+    """Run pylint on the module paths, in parallel processes if jobs > 1
+    :return: Dict with python linter stats"""
+    shards = split_subpaths(subpaths, jobs or 1)
+    if len(shards) == 1:
+        return pylint_lint_run(cmd + subpaths, msgs_by_module)
+    pool = multiprocessing.Pool(len(shards))
+    try:
+        results = pool.map(
+            _pylint_lint_run_buffered,
+            [(cmd + shard, list(sys_paths), msgs_by_module)
+             for shard in shards])
+    finally:
+        pool.close()
+        pool.join()
+    for _stats, output in results:
+        sys.stdout.write(output)
+    return merge_stats([stats for stats, _output in results])
 
 
 @click.command()
@@ -328,8 +858,17 @@ def run_pylint(paths, cfg, beta_msgs=None, sys_paths=None, extra_params=None):
                    "in pylint command")
 @click.option('--msgs-no-count', '-msgs-no-count', multiple=True,
               help="List of messages that will not add to the failure count.")
+@click.option('--jobs', '-j', envvar='PYLINT_JOBS', type=int, default=1,
+              help="Number of processes to lint the modules in parallel.")
+@click.option('--msgs-by-module', is_flag=True,
+              help="Count the messages of each module in the stats.")
+@click.option('--cache/--no-cache', 'use_cache', envvar='PYLINT_CACHE',
+              default=False,
+              help="Reuse the results of the modules not changed since "
+                   "a previous run.")
 def main(paths, config_file, msgs_no_count=None,
-         sys_paths=None, extra_params=None):
+         sys_paths=None, extra_params=None, jobs=1, msgs_by_module=False,
+         use_cache=False):
     """Script to run pylint command with additional params
     to check fails of odoo modules.
     If expected errors is equal to count fails found then
@@ -338,7 +877,10 @@ def main(paths, config_file, msgs_no_count=None,
         stats = run_pylint(
             list(paths), config_file.name,
             sys_paths=sys_paths,
-            extra_params=extra_params)
+            extra_params=extra_params,
+            jobs=jobs,
+            msgs_by_module=msgs_by_module,
+            use_cache=use_cache)
     except UserWarning:
         stats = {'error': -1}
     return stats
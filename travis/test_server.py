@@ -1,104 +1,335 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import datetime
+import hashlib
+import heapq
+import json
 import re
 import os
 import shutil
 import subprocess
 import sys
+import threading
+import time
 from six import string_types
 from getaddons import (
-    get_addons, get_modules, get_modules_info, get_dependencies)
-from travis_helpers import success_msg, fail_msg
+    get_addons, get_modules, get_modules_info, ModuleGraph)
+from git_run import GitRun
+from travis_helpers import success_msg, fail_msg, get_cache_dir, \
+    add_step_time, timed_step
 from configparser import ConfigParser
 
 
-def has_test_errors(fname, dbname, odoo_version, check_loaded=True):
+class PatternSet(object):
     """
-    Check a list of log lines for test errors.
-    Extension point to detect false positives.
+    Set of rules to check log records, see TestLogParser.get_errors_ignore.
+    The string and regex rules are merged in a single regex, so the message
+    is scanned once instead of once per rule. Only the messages matching it
+    are checked again rule by rule to know which one matched. Named groups
+    would tell it without the second check, but they make the scan several
+    times slower. Callables (e.g. rules on the log level) are evaluated one
+    by one. Regex rules with their own group names or references or flags
+    can't be merged and are evaluated one by one too.
     """
-    # Rules defining checks to perform
-    # this can be
-    # - a string which will be checked in a simple substring match
-    # - a regex object that will be matched against the whole message
-    # - a callable that receives a dictionary of the form
-    #     {
-    #         'loglevel': ...,
-    #         'message': ....,
-    #     }
-    errors_ignore = [
-        'Mail delivery failed',
-        'failed sending mail',
-        ]
-    errors_report = [
-        lambda x: x['loglevel'] == 'CRITICAL',
-        'At least one test failed',
-        'no access rules, consider adding one',
-        'invalid module names, ignored',
-        ]
-    # Only check ERROR lines before 7.0
-    if odoo_version < '7.0':
-        errors_report.append(
-            lambda x: x['loglevel'] == 'ERROR')
-
-    def make_pattern_list_callable(pattern_list):
-        for i in range(len(pattern_list)):
-            if isinstance(pattern_list[i], string_types):
-                regex = re.compile(pattern_list[i])
-                pattern_list[i] = lambda x, regex=regex:\
-                    regex.search(x['message'])
-            elif hasattr(pattern_list[i], 'match'):
-                regex = pattern_list[i]
-                pattern_list[i] = lambda x, regex=regex:\
-                    regex.search(x['message'])
-
-    make_pattern_list_callable(errors_ignore)
-    make_pattern_list_callable(errors_report)
-
-    print("-"*10)
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.callables = []
+        # (regex, pattern) of the rules merged in self.regex
+        self.merged = []
+        default_flags = re.compile('').flags
+        for pattern in self.patterns:
+            if isinstance(pattern, string_types):
+                regex = re.compile(pattern)
+            elif hasattr(pattern, 'match'):
+                regex = pattern
+            else:
+                self.callables.append((pattern, pattern))
+                continue
+            if (not isinstance(regex.pattern, string_types) or
+                    regex.flags != default_flags or regex.groupindex or
+                    re.search(r'\\\d', regex.pattern)):
+                self.callables.append(
+                    (lambda x, regex=regex: regex.search(x['message']),
+                     pattern))
+                continue
+            self.merged.append((regex, pattern))
+        self.regex = re.compile('|'.join(
+            '(?:%s)' % regex.pattern for regex, _ in self.merged)) \
+            if self.merged else None
+
+    def match(self, log_record):
+        """Return the first rule matching the log record or None"""
+        message = log_record['message']
+        if self.regex is not None and self.regex.search(message):
+            for regex, pattern in self.merged:
+                if regex.search(message):
+                    return pattern
+        for rule_callable, pattern in self.callables:
+            if rule_callable(log_record):
+                return pattern
+        return None
+
+
+class TestLogParser(object):
+    """
+    Incremental parser of the Odoo log to detect test errors.
+    Lines are fed as they are read and each log record is checked once it
+    is complete (when the next record starts or the log is closed), so only
+    the records with errors are kept in memory.
+    Extension point to detect false positives: see get_errors_ignore and
+    get_errors_report.
+    The timestamps of the records are used to measure the time spent loading
+    each module, running each test python module or class and the slowest
+    queries (only logged with `--log-sql`), see get_timings.
+    """
+
     # Read log file removing ASCII color escapes:
     # http://serverfault.com/questions/71285
     color_regex = re.compile(r'\x1B\[([0-9]{1,2}(;[0-9]{1,2})?)?[m|K]')
-    log_start_regex = re.compile(
-        r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3} \d+ (?P<loglevel>\w+) '
-        '(?P<db>(%s)|([?])) (?P<logger>\S+): (?P<message>.*\S)\s*$' % dbname)
-    log_records = []
-    last_log_record = dict.fromkeys(log_start_regex.groupindex.keys())
-    with open(fname) as log:
-        for line in log:
-            line = color_regex.sub('', line)
-            match = log_start_regex.match(line)
-            if match:
-                last_log_record = match.groupdict()
-                log_records.append(last_log_record)
-            else:
-                last_log_record['message'] = '%s\n%s' % (
-                    last_log_record['message'], line.rstrip('\n')
-                )
-    errors = []
-    for log_record in log_records:
-        ignore = False
-        for ignore_pattern in errors_ignore:
-            if ignore_pattern(log_record):
-                ignore = True
-                break
-        if ignore:
-            continue
-        for report_pattern in errors_report:
-            if report_pattern(log_record):
-                errors.append(log_record)
-                break
 
-    if check_loaded:
-        if not [r for r in log_records if 'Modules loaded.' in r['message']]:
+    # Messages starting the load of a module or the tests of a python module
+    # (odoo < 13.0) or of a test class (odoo >= 13.0)
+    timing_regex = re.compile(
+        r'^(module (?P<module>\S+): creating or updating database tables'
+        r'|Loading module (?P<module_loading>\S+) \(\d+/\d+\)'
+        r'|(?P<tests>\S+\.tests\.\S+) running'
+        r'|Starting (?P<test_class>\w+)\.\w+ \.\.\.)')
+
+    def __init__(self, dbname, odoo_version, check_loaded=True,
+                 max_queries=10):
+        self.odoo_version = odoo_version
+        self.check_loaded = check_loaded
+        self.log_start_regex = re.compile(
+            r'^(?P<date>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) \d+ '
+            r'(?P<loglevel>\w+) '
+            '(?P<db>(%s)|([?])) (?P<logger>\S+): (?P<message>.*\S)\s*$'
+            % dbname)
+        self.errors_ignore = PatternSet(self.get_errors_ignore())
+        self.errors_report = PatternSet(self.get_errors_report())
+        self.last_log_record = None
+        self.modules_loaded = 0
+        self.errors = []
+        self.max_queries = max_queries
+        # {kind: (name, date)} of the module and test sections running
+        self.sections = {}
+        self.timings = {'modules': {}, 'tests': {}}
+        # Heap of (seconds, query) of the slowest queries
+        self.queries = []
+        self.last_query = None
+        self.last_date = None
+
+    def get_errors_ignore(self):
+        """Rules of the log records that are never errors.
+        Each rule can be
+        - a string which will be checked in a simple substring match
+        - a regex object that will be matched against the whole message
+        - a callable that receives a dictionary of the form
+            {
+                'loglevel': ...,
+                'message': ....,
+            }
+        """
+        return [
+            'Mail delivery failed',
+            'failed sending mail',
+        ]
+
+    def get_errors_report(self):
+        """Rules of the log records that are errors, same format than
+        get_errors_ignore"""
+        errors_report = [
+            lambda x: x['loglevel'] == 'CRITICAL',
+            'At least one test failed',
+            'no access rules, consider adding one',
+            'invalid module names, ignored',
+        ]
+        # Only check ERROR lines before 7.0
+        if self.odoo_version < '7.0':
+            errors_report.append(
+                lambda x: x['loglevel'] == 'ERROR')
+        return errors_report
+
+    def feed(self, line):
+        """Parse a line of the log
+        :param line: String with a line of the log
+        """
+        line = self.color_regex.sub('', line)
+        match = self.log_start_regex.match(line)
+        if match:
+            self.check_log_record()
+            self.last_log_record = match.groupdict()
+        elif self.last_log_record is not None:
+            self.last_log_record['message'] = '%s\n%s' % (
+                self.last_log_record['message'], line.rstrip('\n')
+            )
+
+    def check_log_record(self):
+        """Check the last log record, it must be complete"""
+        log_record = self.last_log_record
+        if log_record is None:
+            return
+        self.last_log_record = None
+        if 'Modules loaded.' in log_record['message']:
+            self.modules_loaded += 1
+        self.update_timings(log_record)
+        if self.errors_ignore.match(log_record) is not None:
+            return
+        if self.errors_report.match(log_record) is not None:
+            self.errors.append(log_record)
+
+    @staticmethod
+    def get_seconds(start, end):
+        """Return the seconds between two dates of log records"""
+        start, end = [
+            datetime.datetime.strptime(date, '%Y-%m-%d %H:%M:%S,%f')
+            for date in (start, end)]
+        return (end - start).total_seconds()
+
+    def update_timings(self, log_record):
+        """Start or stop the timed sections and the query timing with a log
+        record. A query lasts until the next record, a test section until
+        another section starts and a module section until another module
+        starts or all the modules are loaded."""
+        date, message = log_record['date'], log_record['message']
+        self.last_date = date
+        if self.last_query is not None:
+            start, query = self.last_query
+            self.last_query = None
+            heapq.heappush(
+                self.queries, (self.get_seconds(start, date), query))
+            if len(self.queries) > self.max_queries:
+                heapq.heappop(self.queries)
+        if log_record['logger'].endswith('.sql_db') and \
+                message.startswith('query:'):
+            self.last_query = (date, message[len('query:'):].strip())
+            return
+        match = self.timing_regex.match(message)
+        if match is None:
+            if 'Modules loaded.' in message:
+                self.stop_sections(date)
+            return
+        module = match.group('module') or match.group('module_loading')
+        test = match.group('tests') or match.group('test_class') and \
+            '%s.%s' % (log_record['logger'], match.group('test_class'))
+        running = self.sections.get('modules' if module else 'tests')
+        if running and running[0] == (module or test):
+            # Same section, e.g. the next test of a class
+            return
+        self.stop_sections(date, ['tests', 'modules'] if module else ['tests'])
+        self.sections['modules' if module else 'tests'] = (
+            module or test, date)
+
+    def stop_sections(self, date, kinds=('tests', 'modules')):
+        """Add the time since they started to the sections running"""
+        for kind in kinds:
+            section = self.sections.pop(kind, None)
+            if section is not None:
+                name, start = section
+                self.timings[kind][name] = self.timings[kind].get(
+                    name, 0.0) + self.get_seconds(start, date)
+
+    def get_timings(self):
+        """Return the durations measured in the log
+        :return: Dict with the keys modules and tests, dicts of
+            {name: seconds}, and queries, list of (seconds, query) of the
+            slowest queries
+        """
+        return {
+            'modules': dict(self.timings['modules']),
+            'tests': dict(self.timings['tests']),
+            'queries': sorted(self.queries, reverse=True),
+        }
+
+    def close(self):
+        """Finish the parsing of the log
+        :return: List of log records with errors
+        """
+        self.check_log_record()
+        if self.last_date is not None:
+            self.stop_sections(self.last_date)
+        errors = list(self.errors)
+        if self.check_loaded and not self.modules_loaded:
             errors.append({'message': "Message not found: 'Modules loaded.'"})
+        return errors
+
+    def print_errors(self, output=None):
+        """Finish the parsing of the log and print the errors found
+        :param output: List to append the lines to instead of printing them
+        :return: Number of errors found
+        """
+        errors = self.close()
+        lines = ["-"*10]
+        if errors:
+            lines.extend(e['message'] for e in errors)
+            lines.append("-"*10)
+        if output is None:
+            print('\n'.join(lines))
+        else:
+            output.extend(lines)
+        return len(errors)
+
 
-    if errors:
-        for e in errors:
-            print(e['message'])
-        print("-"*10)
-    return len(errors)
+def has_test_errors(fname, dbname, odoo_version, check_loaded=True):
+    """
+    Check a list of log lines for test errors.
+    Extension point to detect false positives: see TestLogParser.
+    """
+    parser = TestLogParser(dbname, odoo_version, check_loaded)
+    with open(fname) as log:
+        for line in log:
+            parser.feed(line)
+    return parser.print_errors()
+
+
+def merge_timings(timings_list, max_queries=10):
+    """Sum the durations of several TestLogParser.get_timings, keeping the
+    slowest queries"""
+    res = {'modules': {}, 'tests': {}, 'queries': []}
+    for timings in timings_list:
+        for kind in ('modules', 'tests'):
+            for name, seconds in timings[kind].items():
+                res[kind][name] = res[kind].get(name, 0.0) + seconds
+        res['queries'].extend(timings['queries'])
+    res['queries'] = heapq.nlargest(
+        max_queries, res['queries'], key=lambda query: query[0])
+    return res
+
+
+def print_slowest(timings, limit=10):
+    """Print the slowest modules, tests and queries of the timings"""
+    sections = [
+        ('Slowest modules', sorted(
+            timings['modules'].items(), key=lambda item: -item[1])),
+        ('Slowest tests', sorted(
+            timings['tests'].items(), key=lambda item: -item[1])),
+        ('Slowest queries', [
+            (query, seconds) for seconds, query in timings['queries']]),
+    ]
+    for title, items in sections:
+        if not items:
+            continue
+        print("%s:" % title)
+        for name, seconds in items[:limit]:
+            name = name.replace('\n', ' ')
+            print("%8.3fs %s" % (
+                seconds, name if len(name) <= 200 else name[:197] + '...'))
+
+
+def write_timings_report(timings, report_path):
+    """Write the timings as JSON, the durations ranked from the slowest"""
+    report_dir = os.path.dirname(report_path)
+    if report_dir and not os.path.isdir(report_dir):
+        os.makedirs(report_dir)
+    report = dict(
+        (kind, [{'name': name, 'seconds': seconds} for name, seconds in
+                sorted(timings[kind].items(), key=lambda item: -item[1])])
+        for kind in ('modules', 'tests'))
+    report['queries'] = [{'query': query, 'seconds': seconds}
+                         for seconds, query in timings['queries']]
+    with open(report_path, 'w') as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
 
 
 def parse_list(comma_sep_list):
@@ -179,9 +410,10 @@ def get_test_dependencies(addons_path, addons_list):
         modules = {}
         for path in addons_path.split(','):
             modules.update(get_modules_info(path))
+        graph = ModuleGraph(modules)
         dependencies = set()
         for module in addons_list:
-            dependencies |= get_dependencies(modules, module)
+            dependencies |= graph.get_dependencies(module)
         return list(dependencies - set(addons_list))
 
 
@@ -206,9 +438,121 @@ def cmd_strip_secret(cmd):
     return cmd_secret
 
 
+def get_git_commit(path):
+    """Return the sha of the commit checked out in the git repository
+    containing path or None if it isn't in a git repository"""
+    path = os.path.realpath(path)
+    while not os.path.exists(os.path.join(path, '.git')):
+        if os.path.dirname(path) == path:
+            return None
+        path = os.path.dirname(path)
+    return GitRun(os.path.join(path, '.git')).run(['rev-parse', 'HEAD'])
+
+
+def get_python_packages():
+    """Return the sorted lines of `pip freeze` of this python or None if
+    pip fails"""
+    with open(os.devnull, 'w') as devnull:
+        try:
+            output = subprocess.check_output(
+                [sys.executable, '-m', 'pip', 'freeze'], stderr=devnull)
+        except (subprocess.CalledProcessError, OSError):
+            return None
+    return sorted(output.decode('UTF-8').splitlines())
+
+
+def get_template_fingerprint(server_path, addons_path, preinstall_modules,
+                             options):
+    """Return a hash identifying the template database that installing
+    preinstall_modules would create, made of the commits of odoo and of the
+    repositories of the preinstalled modules, the python packages installed,
+    the modules and the options.
+    :param options: List of options used to install the modules
+    :return: String with the hash or None if a repository has no commit or
+        the python packages are unknown
+    """
+    odoo_commit = get_git_commit(server_path)
+    if not odoo_commit:
+        return None
+    packages = get_python_packages()
+    if packages is None:
+        return None
+    fingerprint = hashlib.sha1()
+    fingerprint.update(odoo_commit.encode('UTF-8'))
+    for package in packages:
+        fingerprint.update(package.encode('UTF-8') + b'\0')
+    preinstall_modules = set(preinstall_modules)
+    server_path = os.path.realpath(server_path)
+    for path in addons_path.split(','):
+        if os.path.realpath(path).startswith(server_path + os.sep):
+            continue
+        if not preinstall_modules & set(get_modules(path)):
+            continue
+        commit = get_git_commit(path)
+        if not commit:
+            return None
+        fingerprint.update(commit.encode('UTF-8'))
+    for item in sorted(preinstall_modules) + list(options):
+        fingerprint.update(item.encode('UTF-8'))
+    return fingerprint.hexdigest()
+
+
+def restore_template(db, fingerprint, data_dir):
+    """Restore the cached template database and filestore with fingerprint
+    in the empty database db.
+    :return: True if the template was restored
+    """
+    dump_path = get_cache_dir('templates', fingerprint + '.dump')
+    if not os.path.isfile(dump_path):
+        return False
+    print("Restoring cached template %s" % fingerprint)
+    if subprocess.call(["pg_restore", "--no-owner", "-d", db, dump_path]):
+        # Start again with an empty database
+        subprocess.call(["dropdb", db])
+        subprocess.check_call(["createdb", db])
+        return False
+    filestore_path = get_cache_dir('templates', fingerprint + '.filestore')
+    attach_dest_dir = os.path.join(data_dir, 'filestore', db)
+    if os.path.isdir(filestore_path) and not os.path.isdir(attach_dest_dir):
+        shutil.copytree(filestore_path, attach_dest_dir)
+    return True
+
+
+def dump_template(db, fingerprint, data_dir):
+    """Store the template database and filestore in the cache directory,
+    removing the templates cached with other fingerprints which are out of
+    date.
+    """
+    cache_dir = get_cache_dir('templates')
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+    dump_path = os.path.join(cache_dir, fingerprint + '.dump')
+    print("Caching template %s" % fingerprint)
+    try:
+        if subprocess.call(["pg_dump", "-Fc", "-f", dump_path + '.tmp', db]):
+            return
+        os.rename(dump_path + '.tmp', dump_path)
+    finally:
+        # Left by a failed pg_dump
+        if os.path.isfile(dump_path + '.tmp'):
+            os.remove(dump_path + '.tmp')
+    for name in os.listdir(cache_dir):
+        if name.startswith(fingerprint + '.'):
+            continue
+        path = os.path.join(cache_dir, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    attach_dir = os.path.join(data_dir, 'filestore', db)
+    filestore_path = os.path.join(cache_dir, fingerprint + '.filestore')
+    if os.path.isdir(attach_dir) and not os.path.isdir(filestore_path):
+        shutil.copytree(attach_dir, filestore_path)
+
+
 def setup_server(db, odoo_unittest, tested_addons, server_path, script_name,
                  addons_path, install_options, preinstall_modules=None,
-                 unbuffer=True, server_options=None):
+                 unbuffer=True, server_options=None, data_dir=None):
     """
     Setup the base module before running the tests
     if the database template exists, then it will be used.
@@ -222,6 +566,10 @@ def setup_server(db, odoo_unittest, tested_addons, server_path, script_name,
     :param preinstall_modules: (list) Modules that should be preinstalled
     :param unbuffer: keeps output colors
     :param server_options: (list) Add these flags to the Odoo server init
+    :param data_dir: Odoo data directory. If it is set and
+        MQT_TEMPLATE_CACHE=1, the template database and its filestore are
+        dumped to the cache directory and restored in later builds with
+        the same odoo commit, modules and options.
     """
     if preinstall_modules is None:
         preinstall_modules = ['base']
@@ -233,6 +581,13 @@ def setup_server(db, odoo_unittest, tested_addons, server_path, script_name,
     except subprocess.CalledProcessError:
         print("Using previous openerp_template database.")
     else:
+        fingerprint = None
+        if data_dir and os.environ.get('MQT_TEMPLATE_CACHE') == '1':
+            fingerprint = get_template_fingerprint(
+                server_path, addons_path, preinstall_modules,
+                install_options + server_options)
+        if fingerprint and restore_template(db, fingerprint, data_dir):
+            return 0
         cmd_odoo = ["unbuffer"] if unbuffer else []
         cmd_odoo += ["%s/%s" % (server_path, script_name),
                      "-d", db,
@@ -245,6 +600,8 @@ def setup_server(db, odoo_unittest, tested_addons, server_path, script_name,
             subprocess.check_call(cmd_odoo)
         except subprocess.CalledProcessError as e:
             return e.returncode
+        if fingerprint:
+            dump_template(db, fingerprint, data_dir)
     return 0
 
 
@@ -290,6 +647,114 @@ def copy_attachments(dbtemplate, dbdest, data_dir):
         shutil.copytree(attach_tmpl_dir, attach_dest_dir)
 
 
+def replace_database(command, database, new_database):
+    """Return a copy of an odoo command using other database"""
+    res = []
+    for param in command:
+        if param == database:
+            param = new_database
+        elif param == "--db-filter=^%s$" % database:
+            param = "--db-filter=^%s$" % new_database
+        res.append(param)
+    return res
+
+
+def run_unit_tests_parallel(to_test_list, commands, dbtemplate, database,
+                            data_dir, odoo_version, jobs, unbuffer=True,
+                            timings=None):
+    """Test each module in its own database using several workers.
+    Each worker uses a database (and filestore) named as `database` with
+    its number as suffix, created from `dbtemplate` for each module.
+    The output of each module is printed when the module is finished to
+    avoid mixing the logs of the workers.
+    :param to_test_list: List of modules to test
+    :param commands: Tuple of (command, check_loaded) to run for each module,
+        the last item of each command is replaced with the module name
+    :param jobs: Number of workers
+    :param timings: List to append the timings of each log parsed
+    :return: Tuple of (list of modules with errors, number of errors)
+    """
+    lock = threading.Lock()
+    pending = list(to_test_list)
+    all_errors = []
+    counted_errors = [0]
+
+    def worker(worker_database):
+        while True:
+            with lock:
+                if not pending:
+                    return
+                to_test = pending.pop(0)
+            output = ["\nTesting %s:" % [to_test]]
+            module_errors = 0
+            pipe = None
+            try:
+                # Copying the same template from several workers at once
+                # can fail if postgres sees it as being accessed
+                with lock:
+                    subprocess.call(
+                        ["createdb", "-T", dbtemplate, worker_database])
+                    copy_attachments(dbtemplate, worker_database, data_dir)
+                for command, check_loaded in commands:
+                    command_call = (["unbuffer"] if unbuffer else []) + \
+                        replace_database(command[:-1] + [to_test],
+                                         database, worker_database)
+                    output.append(" ".join(cmd_strip_secret(command_call)))
+                    pipe = subprocess.Popen(command_call,
+                                            stderr=subprocess.STDOUT,
+                                            stdout=subprocess.PIPE)
+                    log_parser = TestLogParser(
+                        worker_database, odoo_version, check_loaded)
+                    for line in iter(pipe.stdout.readline, b''):
+                        line = line.decode('UTF-8', errors='backslashreplace')
+                        output.append(line.strip())
+                        log_parser.feed(line)
+                    returncode = pipe.wait()
+                    errors = log_parser.print_errors(output)
+                    if timings is not None:
+                        with lock:
+                            timings.append(log_parser.get_timings())
+                    if returncode != 0:
+                        output.append("%s Command exited with code %s" % (
+                            fail_msg, returncode))
+                        # If there are no errors,
+                        # adds an error when returcode!=0
+                        # because it's actually an error.
+                        if not errors:
+                            errors += 1
+                    if errors:
+                        module_errors += errors
+                        output.append("%s Found %d lines with errors" % (
+                            fail_msg, errors))
+            except Exception as e:
+                # The module must not be reported as tested successfully
+                output.append("%s Error testing the module: %r" % (
+                    fail_msg, e))
+                module_errors += 1
+            finally:
+                if pipe is not None and pipe.poll() is None:
+                    pipe.kill()
+                    pipe.wait()
+                subprocess.call(["dropdb", worker_database])
+                shutil.rmtree(
+                    os.path.join(data_dir, 'filestore', worker_database),
+                    ignore_errors=True)
+                with lock:
+                    print('\n'.join(output))
+                    if module_errors:
+                        all_errors.append(to_test)
+                        counted_errors[0] += module_errors
+
+    threads = [
+        threading.Thread(target=worker, args=('%s_%d' % (database, index),))
+        for index in range(1, min(jobs, len(to_test_list)) + 1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return all_errors, counted_errors[0]
+
+
 def main(argv=None):
     if argv is None:
         argv = sys.argv
@@ -312,6 +777,7 @@ def main(argv=None):
     test_enable = str2bool(os.environ.get('TEST_ENABLE', True))
     dbtemplate = os.environ.get('MQT_TEMPLATE_DB', 'openerp_template')
     database = os.environ.get('MQT_TEST_DB', 'openerp_test')
+    test_jobs = int(os.environ.get('MQT_TEST_JOBS', '1'))
     if not odoo_version:
         # For backward compatibility, take version from parameter
         # if it's not globally set
@@ -361,9 +827,10 @@ def main(argv=None):
     preinstall_modules = list(set(preinstall_modules) - set(get_modules(
         os.environ.get('TRAVIS_BUILD_DIR')))) or ['base']
     print("Modules to preinstall: %s" % preinstall_modules)
-    setup_server(dbtemplate, odoo_unittest, tested_addons_list, server_path,
-                 script_name, addons_path, install_options, preinstall_modules,
-                 unbuffer, server_options)
+    with timed_step('template setup'):
+        setup_server(dbtemplate, odoo_unittest, tested_addons_list,
+                     server_path, script_name, addons_path, install_options,
+                     preinstall_modules, unbuffer, server_options, data_dir)
 
     # Running tests
     cmd_odoo_test = ["coverage", "run",
@@ -377,6 +844,10 @@ def main(argv=None):
     if test_loghandler is not None:
         cmd_odoo_test += ['--log-handler', test_loghandler]
     cmd_odoo_test += options + ["--init", None]
+    parallel = odoo_unittest and test_jobs > 1 and not instance_alive
+    if parallel:
+        # each worker writes its own coverage data file
+        cmd_odoo_test.insert(2, "--parallel-mode")
 
     if odoo_unittest:
         to_test_list = tested_addons_list
@@ -395,15 +866,27 @@ def main(argv=None):
                     )
     all_errors = []
     counted_errors = 0
-    for to_test in to_test_list:
+    timings = []
+    if parallel:
+        print("\nTesting modules with %d workers" % test_jobs)
+        with timed_step('tests'):
+            all_errors, counted_errors = run_unit_tests_parallel(
+                to_test_list, commands, dbtemplate, database, data_dir,
+                odoo_version, test_jobs, unbuffer, timings)
+        subprocess.call(["coverage", "combine"])
+        to_test_list_sequential = []
+    else:
+        to_test_list_sequential = to_test_list
+    for to_test in to_test_list_sequential:
         if odoo_unittest:
             print("\nTesting %s:" % [to_test])
         else:
             print("\nTesting %s:" % tested_addons_list)
         try:
-            db_odoo_created = subprocess.call(
-                ["createdb", "-T", dbtemplate, database])
-            copy_attachments(dbtemplate, database, data_dir)
+            with timed_step('createdb'):
+                db_odoo_created = subprocess.call(
+                    ["createdb", "-T", dbtemplate, database])
+                copy_attachments(dbtemplate, database, data_dir)
         except subprocess.CalledProcessError:
             db_odoo_created = True
         for command, check_loaded in commands:
@@ -424,19 +907,30 @@ def main(argv=None):
                 # Run test command; unbuffer keeps output colors
                 command_call = (["unbuffer"] if unbuffer else []) + command
             print(" ".join(cmd_strip_secret(command_call)))
-            pipe = subprocess.Popen(command_call,
-                                    stderr=subprocess.STDOUT,
-                                    stdout=subprocess.PIPE)
-            with open('stdout.log', 'wb') as stdout:
-                for line in iter(pipe.stdout.readline, b''):
-                    stdout.write(line)
-                    print(line.strip().decode(
-                        'UTF-8', errors='backslashreplace'
-                    ))
-            returncode = pipe.wait()
-            # Find errors, except from failed mails
-            errors = has_test_errors(
-                "stdout.log", database, odoo_version, check_loaded)
+            # Only the test command checks the modules loaded
+            with timed_step('tests' if check_loaded else 'install'):
+                pipe = subprocess.Popen(command_call,
+                                        stderr=subprocess.STDOUT,
+                                        stdout=subprocess.PIPE)
+                # Find errors while the log is read, except from failed mails
+                log_parser = TestLogParser(
+                    database, odoo_version, check_loaded)
+                # Time spent parsing the log, included in the step time
+                scan_time = 0.0
+                with open('stdout.log', 'wb') as stdout:
+                    for line in iter(pipe.stdout.readline, b''):
+                        stdout.write(line)
+                        line = line.decode('UTF-8',
+                                           errors='backslashreplace')
+                        print(line.strip())
+                        start = time.time()
+                        log_parser.feed(line)
+                        scan_time += time.time() - start
+                returncode = pipe.wait()
+            start = time.time()
+            errors = log_parser.print_errors()
+            add_step_time('log scan', scan_time + time.time() - start)
+            timings.append(log_parser.get_timings())
             if returncode != 0:
                 all_errors.append(to_test)
                 print(fail_msg, "Command exited with code %s" % returncode)
@@ -453,6 +947,15 @@ def main(argv=None):
             # Don't drop the database if will be used later.
             subprocess.call(["dropdb", database])
 
+    timings = merge_timings(timings)
+    print_slowest(timings)
+    report_path = os.environ.get('MQT_TIMINGS_REPORT') or \
+        get_cache_dir('timings_report.json')
+    try:
+        write_timings_report(timings, report_path)
+    except (IOError, OSError) as e:
+        print("Error writing the timings report %s: %s" % (report_path, e))
+
     print('Module test summary')
     for to_test in to_test_list:
         if to_test in all_errors:
@@ -486,7 +989,9 @@ def main(argv=None):
             'travis_makepot',
             database,
         ]
-        if subprocess.call(makepot_cmd) != 0:
+        with timed_step('makepot'):
+            makepot_returncode = subprocess.call(makepot_cmd)
+        if makepot_returncode != 0:
             return 1
     # if we get here, all is OK
     return 0
@@ -3,6 +3,17 @@
 helpers shared by the various QA tools
 """
 
+import collections
+import contextlib
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
 
 RED = "\033[1;31m"
 GREEN = "\033[1;32m"
@@ -32,5 +43,73 @@ def yellow_light(text):
     return colorized(text, YELLOW_LIGHT)
 
 
+def get_cache_dir(*paths):
+    """Return the path of the MQT cache directory or of a path inside it.
+    The directory is taken from the `MQT_CACHE_DIR` environment variable
+    and defaults to `~/.cache/mqt`.
+    :param paths: Optional path components to join to the cache directory
+    :return: String with the full path
+    """
+    cache_dir = os.path.expanduser(
+        os.environ.get('MQT_CACHE_DIR', '~/.cache/mqt'))
+    return os.path.join(cache_dir, *paths)
+
+
+def get_branch_base():
+    """Return the git ref of the branch the changes are compared with,
+    `origin/` plus the `TRAVIS_BRANCH` or `VERSION` environment variable"""
+    branch_base = os.environ.get('TRAVIS_BRANCH') or os.environ.get('VERSION')
+    if branch_base != 'HEAD':
+        branch_base = 'origin/' + (branch_base and branch_base or '')
+    return branch_base
+
+
+def get_resource_usage():
+    """Return the CPU time and the peak RSS of this process and its children
+    already finished
+    :return: Tuple (Float seconds of user and system CPU time,
+        Integer KiB of the largest resident set size)
+    """
+    if resource is None:
+        return 0.0, 0
+    usages = [resource.getrusage(resource.RUSAGE_SELF),
+              resource.getrusage(resource.RUSAGE_CHILDREN)]
+    return (sum(usage.ru_utime + usage.ru_stime for usage in usages),
+            max(usage.ru_maxrss for usage in usages))
+
+
+# Wall and CPU time of the steps run in this process, by name
+_steps = collections.OrderedDict()
+_steps_lock = threading.Lock()
+
+
+def add_step_time(name, wall, cpu=0.0):
+    """Add seconds of wall and CPU time to the step `name`"""
+    with _steps_lock:
+        step = _steps.setdefault(name, {'wall': 0.0, 'cpu': 0.0, 'count': 0})
+        step['wall'] += wall
+        step['cpu'] += cpu
+        step['count'] += 1
+
+
+@contextlib.contextmanager
+def timed_step(name):
+    """Add the wall time and the CPU time of this process and of the
+    children waited for to the step `name` when the block ends"""
+    start, start_cpu = time.time(), get_resource_usage()[0]
+    try:
+        yield
+    finally:
+        add_step_time(name, time.time() - start,
+                      get_resource_usage()[0] - start_cpu)
+
+
+def get_step_times():
+    """Return the list of steps timed in this process, in the order they
+    started, as dicts with the keys name, wall, cpu and count"""
+    with _steps_lock:
+        return [dict(step, name=name) for name, step in _steps.items()]
+
+
 fail_msg = red("FAIL")
 success_msg = green("Success")
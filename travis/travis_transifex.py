@@ -5,8 +5,9 @@ from __future__ import unicode_literals
 import os
 import sys
 import time
-import subprocess
 from slumber import API, exceptions
+from getaddons import get_pot_fingerprints
+from git_run import GitRun
 from odoo_connection import context_mapping, Odoo10Context
 from test_server import setup_server, get_addons_path, \
     get_server_path, get_addons_to_check, create_server_conf, get_server_script
@@ -14,6 +15,30 @@ from travis_helpers import yellow, yellow_light, red
 from txclib import utils, commands
 
 
+def set_po_timestamps(repo_path, modules):
+    """Set the modification time of the PO files of the modules to the date
+    of their last commit, resolved for all the files in one history walk
+    :param repo_path: Path of the repository with the modules
+    :param modules: List of names of the modules
+    """
+    po_files = []
+    for module in modules:
+        i18n_folder = os.path.join(module, 'i18n')
+        i18n_path = os.path.join(repo_path, i18n_folder)
+        if not os.path.isdir(i18n_path):
+            continue
+        po_files.extend(os.path.join(i18n_folder, po_file_name)
+                        for po_file_name in os.listdir(i18n_path)
+                        if po_file_name.endswith('.po'))
+    with GitRun(os.path.join(repo_path, '.git')) as git_run:
+        timestamps = git_run.get_last_commit_timestamps(po_files)
+    for po_file_name, timestamp in timestamps.items():
+        # This converts to UTC the timestamp
+        timestamp = time.mktime(time.gmtime(timestamp))
+        po_file_name = os.path.join(repo_path, po_file_name)
+        os.utime(po_file_name, (timestamp, timestamp))
+
+
 def main(argv=None):
     """
     Export translation files and push them to Transifex
@@ -87,6 +112,22 @@ def main(argv=None):
         print(yellow_light("WARNING! Nothing to translate- exiting early."))
         return 0
 
+    # Skip the modules without changes since the last push
+    fingerprint_store, fingerprints = get_pot_fingerprints(
+        travis_build_dir, addons_list, odoo_version)
+    if fingerprint_store:
+        changed = fingerprint_store.get_changed(fingerprints)
+        unchanged = [module for module in addons_list if module not in changed]
+        if unchanged:
+            print(yellow_light("Skipping modules without changes since the "
+                               "last push: %s" % ','.join(unchanged)))
+        addons_list = [module for module in addons_list if module in changed]
+        addons = ','.join(addons_list)
+        if not addons:
+            print(yellow_light("Nothing changed since the last push- "
+                               "exiting early."))
+            return 0
+
     # Create Transifex project if it doesn't exist
     print()
     print(yellow("Creating Transifex project if it doesn't exist"))
@@ -137,40 +178,29 @@ def main(argv=None):
     commands.cmd_init(init_args, path_to_tx=None)
     path_to_tx = utils.find_dot_tx()
 
+    # Put the correct timestamp for letting known tx client which
+    # translations to update
+    set_po_timestamps(travis_build_dir, addons_list)
+
     # Use by default version 10 connection context
     connection_context = context_mapping.get(odoo_version, Odoo10Context)
+
+    def get_source_filename(module):
+        i18n_folder = os.path.join(travis_build_dir, module, 'i18n')
+        # Create i18n/ directory if doesn't exist
+        if not os.path.exists(i18n_folder):
+            os.makedirs(i18n_folder)
+        return os.path.join(i18n_folder, module + ".pot")
+
+    print()
+    print(yellow("Obtaining POT files for %s" % addons))
     with connection_context(server_path, addons_path, database) \
             as odoo_context:
-        for module in addons_list:
-            print()
-            print(yellow("Obtaining POT file for %s" % module))
-            i18n_folder = os.path.join(travis_build_dir, module, 'i18n')
-            source_filename = os.path.join(i18n_folder, module + ".pot")
-            # Create i18n/ directory if doesn't exist
-            if not os.path.exists(os.path.dirname(source_filename)):
-                os.makedirs(os.path.dirname(source_filename))
-            pot_contents = odoo_context.get_pot_contents(module)
-            if isinstance(pot_contents, str):
-                f = open(source_filename, 'w')
-            else:  # Odoo in Python 3 returns bytes
-                f = open(source_filename, 'wb')
-            f.write(pot_contents)
-            f.close()
-            # Put the correct timestamp for letting known tx client which
-            # translations to update
-            for po_file_name in os.listdir(i18n_folder):
-                if not po_file_name.endswith('.po'):
-                    continue
-                po_file_name = os.path.join(i18n_folder, po_file_name)
-                command = ['git', 'log', '--pretty=format:%cd', '-n1',
-                           '--date=raw', po_file_name]
-                timestamp = float(subprocess.check_output(command).split()[0])
-                # This converts to UTC the timestamp
-                timestamp = time.mktime(time.gmtime(timestamp))
-                os.utime(po_file_name, (timestamp, timestamp))
-
+        for module, source_filename in odoo_context.export_pots(
+                addons_list, get_source_filename):
             print()
-            print(yellow("Linking POT file and Transifex resource"))
+            print(yellow("Linking POT file and Transifex resource of %s"
+                         % module))
             set_args = ['-t', 'PO',
                         '--auto-local',
                         '-r', '%s.%s' % (transifex_project_slug, module),
@@ -182,8 +212,13 @@ def main(argv=None):
 
     print()
     print(yellow('Pushing translation files to Transifex'))
-    push_args = ['-s', '-t', '--skip']
+    push_args = ['-s', '-t', '--skip',
+                 '-r', ','.join('%s.%s' % (transifex_project_slug, module)
+                                for module in addons_list)]
     commands.cmd_push(push_args, path_to_tx)
+    if fingerprint_store:
+        fingerprint_store.update(
+            dict((module, fingerprints[module]) for module in addons_list))
 
     return 0
 